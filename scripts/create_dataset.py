@@ -16,7 +16,9 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description='Create current customer dataset')
     parser.add_argument('--output', type=str, default='output/current_customer_dataset.csv',
-                       help='Output CSV file path')
+                       help='Output file path')
+    parser.add_argument('--format', type=str, choices=['csv', 'parquet'],
+                       help='Output format (defaults to the --output file extension)')
     parser.add_argument('--dbname', type=str, help='Database name')
     parser.add_argument('--user', type=str, help='Database user')
     parser.add_argument('--password', type=str, help='Database password')
@@ -27,6 +29,8 @@ if __name__ == "__main__":
     args = parser.parse_args()
     
     output_path = Path(args.output)
+    if args.format:
+        output_path = output_path.with_suffix(f'.{args.format}')
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
     db = Database(
@@ -24,7 +24,12 @@ if __name__ == "__main__":
     parser.add_argument('--host', type=str, default='localhost', help='Database host')
     parser.add_argument('--port', type=int, default=5432, help='Database port')
     parser.add_argument('--schema', type=str, default='churn_analytics', help='Schema name')
-    parser.add_argument('--batch-size', type=int, default=10000, help='Batch size for inserts')
+    parser.add_argument('--chunk-size', type=int, default=100000,
+                       help='Number of CSV rows loaded per COPY')
+    parser.add_argument('--workers', type=int, default=4,
+                       help='Number of parallel COPY connections')
+    parser.add_argument('--drop-indexes', action='store_true',
+                       help='Drop and rebuild event indexes around the merge (for large initial loads)')
     
     args = parser.parse_args()
     
@@ -38,7 +43,8 @@ if __name__ == "__main__":
     )
     
     try:
-        load_csv_to_database(args.csv_path, db, batch_size=args.batch_size)
+        load_csv_to_database(args.csv_path, db, chunk_size=args.chunk_size,
+                             workers=args.workers, drop_indexes=args.drop_indexes)
     except Exception as e:
         print(f"Error loading data: {e}", file=sys.stderr)
         raise
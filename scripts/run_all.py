@@ -0,0 +1,14 @@
+#!/usr/bin/env python
+"""
+Standalone script to run milestones 1-3 in one process
+"""
+import sys
+from pathlib import Path
+
+src_path = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(src_path))
+
+from run_all import main
+
+if __name__ == "__main__":
+    main()
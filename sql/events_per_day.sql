@@ -7,16 +7,16 @@
 
 WITH date_range AS (
     SELECT i::timestamp AS calc_date
-    FROM generate_series('%from_yyyy-mm-dd'::date, '%to_yyyy-mm-dd'::date, '1 day'::interval) i
+    FROM generate_series(%(start_date)s::date, %(end_date)s::date, '1 day'::interval) i
 ),
 the_event AS (
     SELECT * 
     FROM churn_analytics.event e
     INNER JOIN churn_analytics.event_type et ON et.event_type_id = e.event_type_id
-    WHERE et.event_type_name = '%event2measure'
+    WHERE et.event_type_name = %(event_type_name)s
 )
 SELECT 
-    calc_date AS event_date,
+    calc_date::date AS event_date,
     COUNT(e.*) AS n_event
 FROM date_range d
 LEFT OUTER JOIN the_event e ON d.calc_date = e.event_time::date
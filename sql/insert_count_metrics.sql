@@ -0,0 +1,27 @@
+-- Insert count metrics for several event types in a single pass over the event table
+-- Counts events in the 28 days prior to each metric_date
+-- Parameters: start_date, end_date,
+--   event_type_names, metric_name_ids (parallel lists: event type i is stored
+--   under metric_name_ids[i])
+
+WITH date_vals AS (
+    SELECT i::timestamp AS metric_date 
+    FROM generate_series(%(start_date)s::date, %(end_date)s::date, '7 day'::interval) i
+)
+INSERT INTO churn_analytics.metric (account_id, metric_time, metric_name_id, metric_value)
+SELECT 
+    e.account_id, 
+    d.metric_date, 
+    n.metric_name_id, 
+    COUNT(*) AS metric_value
+FROM churn_analytics.event e 
+INNER JOIN date_vals d
+    ON e.event_time < d.metric_date 
+    AND e.event_time >= d.metric_date - INTERVAL '28 day'
+INNER JOIN churn_analytics.event_type t 
+    ON t.event_type_id = e.event_type_id
+INNER JOIN unnest(%(event_type_names)s::text[], %(metric_name_ids)s::integer[])
+    AS n(event_type_name, metric_name_id)
+    ON n.event_type_name = t.event_type_name
+GROUP BY e.account_id, d.metric_date, n.metric_name_id
+ON CONFLICT (account_id, metric_name_id, metric_time) DO NOTHING;
@@ -4,8 +4,8 @@
 
 WITH date_range AS (
     SELECT 
-        '%from_yyyy-mm-dd'::timestamp AS start_date,
-        '%to_yyyy-mm-dd'::timestamp AS end_date
+        %(start_date)s::timestamp AS start_date,
+        %(end_date)s::timestamp AS end_date
 ),
 account_count AS (
     SELECT COUNT(DISTINCT account_id) AS n_account
@@ -4,17 +4,17 @@
 
 WITH date_range AS (
     SELECT i::timestamp AS calc_date 
-    FROM generate_series('%from_yyyy-mm-dd'::date, '%to_yyyy-mm-dd'::date, '7 day'::interval) i
+    FROM generate_series(%(start_date)s::date, %(end_date)s::date, '7 day'::interval) i
 ),
 the_metric AS (
     SELECT * 
     FROM churn_analytics.metric m
     INNER JOIN churn_analytics.metric_name n 
         ON m.metric_name_id = n.metric_name_id
-    WHERE n.metric_name = '%metric2measure'
+    WHERE n.metric_name = %(metric_name)s
 )
 SELECT 
-    calc_date,
+    calc_date::date AS calc_date,
     AVG(metric_value) AS avg,
     COUNT(the_metric.*) AS n_calc,
     MIN(metric_value) AS min,
@@ -1,36 +1,38 @@
 """
 Calculate and insert basic customer metrics
 """
+import logging
 import sys
-from pathlib import Path
 try:
-    from .database import Database
+    from .database import Database, load_sql
 except ImportError:
-    from database import Database
+    from database import Database, load_sql
 from psycopg2 import sql
+from psycopg2.extras import execute_values
+
+
+logger = logging.getLogger(__name__)
 
 
 def create_metric_tables(db: Database):
     """Create metric and metric_name tables"""
-    print("Creating metric tables...")
+    logger.info("Creating metric tables...")
     db.create_schema()
-    db.set_search_path()
-    
-    schema_sql_path = Path(__file__).parent.parent / 'sql' / 'create_metric_tables.sql'
-    with open(schema_sql_path, 'r') as f:
-        schema_sql = f.read()
-        for statement in schema_sql.split(';'):
-            statement = statement.strip()
-            if statement:
-                db.execute(statement)
+    
+    schema_sql = load_sql('create_metric_tables.sql')
+    
+    # Send the whole DDL script in one round-trip (no params, so no % interpolation)
+    db.execute(schema_sql)
     db.commit()
-    print("Metric tables created")
+    logger.info("Metric tables created")
 
 
 def insert_metric_name(db: Database, metric_name: str):
     """
     Insert a metric name and return its ID
     
+    The caller is responsible for committing the transaction.
+    
     Args:
         db: Database instance
         metric_name: Name of the metric
@@ -38,25 +40,37 @@ def insert_metric_name(db: Database, metric_name: str):
     Returns:
         metric_name_id
     """
+    # The no-op update makes RETURNING yield the id for existing names too
     query = sql.SQL("""
         INSERT INTO churn_analytics.metric_name (metric_name)
         VALUES (%s)
-        ON CONFLICT (metric_name) DO NOTHING
+        ON CONFLICT (metric_name) DO UPDATE SET metric_name = EXCLUDED.metric_name
         RETURNING metric_name_id
     """)
     db.execute(query, (metric_name,))
-    result = db.cursor.fetchone()
+    return db.cursor.fetchone()[0]
+
+
+def insert_metric_names(db: Database, metric_names: list):
+    """
+    Insert several metric names in one statement and return their IDs
     
-    if result:
-        metric_id = result[0]
-    else:
-        # Metric already exists, get its ID
-        query = sql.SQL("SELECT metric_name_id FROM churn_analytics.metric_name WHERE metric_name = %s")
-        db.execute(query, (metric_name,))
-        metric_id = db.cursor.fetchone()[0]
+    The caller is responsible for committing the transaction.
     
-    db.commit()
-    return metric_id
+    Args:
+        db: Database instance
+        metric_names: Names of the metrics
+    
+    Returns:
+        Dictionary mapping metric_name to metric_name_id
+    """
+    results = execute_values(db.cursor, """
+        INSERT INTO churn_analytics.metric_name (metric_name)
+        VALUES %s
+        ON CONFLICT (metric_name) DO UPDATE SET metric_name = EXCLUDED.metric_name
+        RETURNING metric_name, metric_name_id
+    """, [(metric_name,) for metric_name in metric_names], fetch=True)
+    return dict(results)
 
 
 def insert_count_metric(db: Database, 
@@ -74,34 +88,24 @@ def insert_count_metric(db: Database,
         start_date: Start date in YYYY-MM-DD format
         end_date: End date in YYYY-MM-DD format
     """
-    print(f"Calculating metric '{metric_name}' for event '{event_type_name}'...")
+    logger.info("Calculating metric '%s' for event '%s'...", metric_name, event_type_name)
     
     # Get or create metric name
     metric_id = insert_metric_name(db, metric_name)
     
-    # Read and execute insert SQL
-    sql_path = Path(__file__).parent.parent / 'sql' / 'insert_count_metric.sql'
-    with open(sql_path, 'r') as f:
-        query = f.read()
-    
-    # Replace placeholders
-    query = query.replace('%from_yyyy-mm-dd', start_date)
-    query = query.replace('%to_yyyy-mm-dd', end_date)
-    query = query.replace('%new_metric_id', str(metric_id))
-    query = query.replace('%event2measure', event_type_name)
-    
-    db.set_search_path()
-    db.execute(query)
+    # Same query text for every event, values are sent as bind parameters
+    query = load_sql('insert_count_metric.sql')
+    db.execute(query, {
+        'start_date': start_date,
+        'end_date': end_date,
+        'metric_name_id': metric_id,
+        'event_type_name': event_type_name,
+    })
+    # Rows affected by the INSERT ... SELECT, no need to count them again
+    count = db.cursor.rowcount
     db.commit()
     
-    # Get count of inserted rows
-    db.execute("""
-        SELECT COUNT(*) 
-        FROM churn_analytics.metric 
-        WHERE metric_name_id = %s
-    """, (metric_id,))
-    count = db.cursor.fetchone()[0]
-    print(f"  Inserted {count:,} metric values for '{metric_name}'")
+    logger.info("  Inserted %s metric values for '%s'", format(count, ','), metric_name)
 
 
 def calculate_metrics_for_common_events(db: Database,
@@ -117,20 +121,13 @@ def calculate_metrics_for_common_events(db: Database,
         end_date: End date in YYYY-MM-DD format
         min_events_per_month: Minimum events per month threshold
     """
-    print(f"\n{'='*60}")
-    print("Calculating Metrics for Common Events")
-    print(f"{'='*60}")
+    logger.info("\n%s", '='*60)
+    logger.info("Calculating Metrics for Common Events")
+    logger.info("%s", '='*60)
     
     # Get common events from events_per_account analysis
-    events_sql_path = Path(__file__).parent.parent / 'sql' / 'events_per_account.sql'
-    with open(events_sql_path, 'r') as f:
-        query = f.read()
-    
-    query = query.replace('%from_yyyy-mm-dd', start_date)
-    query = query.replace('%to_yyyy-mm-dd', end_date)
-    
-    db.set_search_path()
-    db.execute(query)
+    db.execute(load_sql('events_per_account.sql'),
+               {'start_date': start_date, 'end_date': end_date})
     results = db.cursor.fetchall()
     
     # Filter events above threshold
@@ -141,23 +138,31 @@ def calculate_metrics_for_common_events(db: Database,
         if events_per_month > min_events_per_month:
             common_events.append(event_name)
     
-    print(f"\nFound {len(common_events)} events above {min_events_per_month} events/month threshold")
-    print(f"Events: {', '.join(common_events[:10])}{'...' if len(common_events) > 10 else ''}\n")
+    logger.info("\nFound %s events above %s events/month threshold", len(common_events), min_events_per_month)
+    logger.info("Events: %s%s\n", ', '.join(common_events[:10]), '...' if len(common_events) > 10 else '')
     
-    # Calculate metrics for each common event
-    for event_name in common_events:
-        # Create metric name: "count_{event_name}"
-        metric_name = f"count_{event_name}"
-        try:
-            insert_count_metric(db, event_name, metric_name, start_date, end_date)
-        except Exception as e:
-            print(f"  Error calculating metric for {event_name}: {e}")
-            continue
+    if not common_events:
+        return
     
-    print(f"\nCompleted calculating metrics for {len(common_events)} event types")
+    # Register one metric name per event: "count_{event_name}"
+    metric_ids = insert_metric_names(db, [f"count_{event_name}" for event_name in common_events])
+    
+    # Count all common events in one scan of the event table
+    db.execute(load_sql('insert_count_metrics.sql'), {
+        'start_date': start_date,
+        'end_date': end_date,
+        'event_type_names': common_events,
+        'metric_name_ids': [metric_ids[f"count_{event_name}"] for event_name in common_events],
+    })
+    inserted = db.cursor.rowcount
+    db.commit()
+    
+    logger.info("  Inserted %s metric values", format(inserted, ','))
+    logger.info("\nCompleted calculating metrics for %s event types", len(common_events))
 
 
-if __name__ == "__main__":
+def main():
+    """Calculate customer metrics from the command line"""
     import argparse
     
     parser = argparse.ArgumentParser(description='Calculate customer metrics')
@@ -179,6 +184,7 @@ if __name__ == "__main__":
     parser.add_argument('--schema', type=str, default='churn_analytics', help='Schema name')
     
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
     
     db = Database(
         dbname=args.dbname,
@@ -206,3 +212,6 @@ if __name__ == "__main__":
     finally:
         db.close()
 
+
+if __name__ == "__main__":
+    main()
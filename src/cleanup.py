@@ -2,6 +2,8 @@
 Cleanup utility to reset the database and remove all generated files
 Useful for starting fresh or testing
 """
+import logging
+import os
 import sys
 from pathlib import Path
 try:
@@ -11,6 +13,13 @@ except ImportError:
 from psycopg2 import sql
 
 
+logger = logging.getLogger(__name__)
+
+
+# File types generated by the pipeline that cleanup_output_files removes
+OUTPUT_EXTENSIONS = {'.csv', '.png', '.pdf'}
+
+
 def cleanup_database(db: Database, schema: str = 'churn_analytics'):
     """
     Drop all tables and schema from the database
@@ -19,12 +28,11 @@ def cleanup_database(db: Database, schema: str = 'churn_analytics'):
         db: Database instance
         schema: Schema name to clean
     """
-    print(f"\n{'='*60}")
-    print("Cleaning Database")
-    print(f"{'='*60}")
+    logger.info("\n%s", '='*60)
+    logger.info("Cleaning Database")
+    logger.info("%s", '='*60)
     
     db.connect()
-    db.set_search_path()
     
     # Drop all tables in the schema
     tables = [
@@ -41,9 +49,9 @@ def cleanup_database(db: Database, schema: str = 'churn_analytics'):
                 sql.Identifier(table)
             )
             db.execute(query)
-            print(f"  Dropped table: {schema}.{table}")
+            logger.info("  Dropped table: %s.%s", schema, table)
         except Exception as e:
-            print(f"  Warning: Could not drop {schema}.{table}: {e}")
+            logger.warning("  Warning: Could not drop %s.%s: %s", schema, table, e)
     
     # Drop the schema itself
     try:
@@ -52,11 +60,11 @@ def cleanup_database(db: Database, schema: str = 'churn_analytics'):
         )
         db.execute(query)
         db.commit()
-        print(f"  Dropped schema: {schema}")
+        logger.info("  Dropped schema: %s", schema)
     except Exception as e:
-        print(f"  Warning: Could not drop schema {schema}: {e}")
+        logger.warning("  Warning: Could not drop schema %s: %s", schema, e)
     
-    print("Database cleanup complete!")
+    logger.info("Database cleanup complete!")
 
 
 def cleanup_output_files(output_dir: str = 'output'):
@@ -66,43 +74,33 @@ def cleanup_output_files(output_dir: str = 'output'):
     Args:
         output_dir: Output directory to clean
     """
-    print(f"\n{'='*60}")
-    print("Cleaning Output Files")
-    print(f"{'='*60}")
+    logger.info("\n%s", '='*60)
+    logger.info("Cleaning Output Files")
+    logger.info("%s", '='*60)
     
     output_path = Path(output_dir)
     
     if not output_path.exists():
-        print(f"  Output directory does not exist: {output_dir}")
+        logger.info("  Output directory does not exist: %s", output_dir)
         return
     
-    # Remove all CSV files
-    csv_files = list(output_path.glob('*.csv'))
-    for csv_file in csv_files:
-        csv_file.unlink()
-        print(f"  Removed: {csv_file.name}")
-    
-    # Remove all PNG files
-    png_files = list(output_path.glob('*.png'))
-    for png_file in png_files:
-        png_file.unlink()
-        print(f"  Removed: {png_file.name}")
-    
-    # Remove all PDF files
-    pdf_files = list(output_path.glob('*.pdf'))
-    for pdf_file in pdf_files:
-        pdf_file.unlink()
-        print(f"  Removed: {pdf_file.name}")
+    # Remove all CSV, PNG and PDF files in a single pass over the directory
+    with os.scandir(output_path) as entries:
+        output_files = [entry.path for entry in entries
+                        if entry.is_file() and os.path.splitext(entry.name)[1] in OUTPUT_EXTENSIONS]
+    for output_file in output_files:
+        os.unlink(output_file)
+        logger.debug("  Removed: %s", os.path.basename(output_file))
     
     # Try to remove the directory if empty
     try:
         if output_path.exists() and not any(output_path.iterdir()):
             output_path.rmdir()
-            print(f"  Removed empty directory: {output_dir}")
+            logger.info("  Removed empty directory: %s", output_dir)
     except Exception:
         pass
     
-    print(f"Output cleanup complete! ({len(csv_files) + len(png_files) + len(pdf_files)} files removed)")
+    logger.info("Output cleanup complete! (%s files removed)", len(output_files))
 
 
 def cleanup_all(db: Database, 
@@ -118,21 +116,21 @@ def cleanup_all(db: Database,
         output_dir: Output directory to clean
         keep_output_dir: If True, keep the output directory structure
     """
-    print(f"\n{'='*60}")
-    print("FULL CLEANUP - Removing All Data and Outputs")
-    print(f"{'='*60}")
-    print("\n⚠️  WARNING: This will delete:")
-    print(f"  - All tables in schema '{schema}'")
-    print(f"  - All files in '{output_dir}'")
-    print("\nThis action cannot be undone!")
+    logger.info("\n%s", '='*60)
+    logger.info("FULL CLEANUP - Removing All Data and Outputs")
+    logger.info("%s", '='*60)
+    logger.warning("\n⚠️  WARNING: This will delete:")
+    logger.info("  - All tables in schema '%s'", schema)
+    logger.info("  - All files in '%s'", output_dir)
+    logger.info("\nThis action cannot be undone!")
     
     try:
         response = input("\nAre you sure you want to continue? (yes/no): ")
         if response.lower() not in ['yes', 'y']:
-            print("Cleanup cancelled.")
+            logger.info("Cleanup cancelled.")
             return
     except KeyboardInterrupt:
-        print("\nCleanup cancelled.")
+        logger.info("\nCleanup cancelled.")
         return
     
     # Clean database
@@ -141,15 +139,16 @@ def cleanup_all(db: Database,
     # Clean output files
     cleanup_output_files(output_dir)
     
-    print(f"\n{'='*60}")
-    print("Cleanup Complete!")
-    print(f"{'='*60}")
-    print("\nYou can now start fresh:")
-    print("  1. Load your data: make load-data DATA_FILE=data/your_file.csv")
-    print("  2. Run analyses: make run-analysis START_DATE=... END_DATE=...")
+    logger.info("\n%s", '='*60)
+    logger.info("Cleanup Complete!")
+    logger.info("%s", '='*60)
+    logger.info("\nYou can now start fresh:")
+    logger.info("  1. Load your data: make load-data DATA_FILE=data/your_file.csv")
+    logger.info("  2. Run analyses: make run-analysis START_DATE=... END_DATE=...")
 
 
-if __name__ == "__main__":
+def main():
+    """Clean database and output files from the command line"""
     import argparse
     
     parser = argparse.ArgumentParser(description='Clean database and output files')
@@ -170,6 +169,7 @@ if __name__ == "__main__":
                        help='Skip confirmation prompt')
     
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
     
     if args.output_only:
         cleanup_output_files(args.output_dir)
@@ -205,3 +205,6 @@ if __name__ == "__main__":
         finally:
             db.close()
 
+
+if __name__ == "__main__":
+    main()
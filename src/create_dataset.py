@@ -2,19 +2,25 @@
 Create current customer dataset from metrics
 One row per customer, one column per metric
 """
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from pathlib import Path
 try:
-    from .database import Database
+    from .database import Database, load_sql
 except ImportError:
-    from database import Database
+    from database import Database, load_sql
 from psycopg2 import sql
 
 
+# Rows pulled per round-trip when streaming metrics from the server
+FETCH_SIZE = 100_000
+
+
 def get_latest_metric_time(db: Database):
     """Get the latest metric_time from the database"""
-    db.set_search_path()
     db.execute("SELECT MAX(metric_time) FROM churn_analytics.metric")
     result = db.cursor.fetchone()
     if not result or not result[0]:
@@ -24,19 +30,29 @@ def get_latest_metric_time(db: Database):
 
 def get_metric_names(db: Database):
     """Get all metric names from the database"""
-    db.set_search_path()
     db.execute("SELECT metric_name FROM churn_analytics.metric_name ORDER BY metric_name_id")
     results = db.cursor.fetchall()
     return [row[0] for row in results]
 
 
+def downcast_column(column: pd.Series) -> pd.Series:
+    """
+    Shrink a metric column to the smallest unsigned integer type when it only
+    holds non-negative whole numbers (event counts), otherwise to float32
+    """
+    downcast = pd.to_numeric(column, downcast='unsigned')
+    if downcast.dtype.kind == 'u':
+        return downcast
+    return downcast.astype(np.float32)
+
+
 def create_current_dataset(db: Database, output_path: str = None):
     """
     Create current customer dataset
     
     Args:
         db: Database instance
-        output_path: Path to save CSV file
+        output_path: Path to save the dataset (.parquet writes Parquet, anything else CSV)
     
     Returns:
         DataFrame with current customer dataset
@@ -56,60 +72,61 @@ def create_current_dataset(db: Database, output_path: str = None):
     
     print(f"Found {len(metric_names)} metrics: {', '.join(metric_names[:5])}{'...' if len(metric_names) > 5 else ''}")
     
-    # Get accounts with recent events (active customers)
-    db.set_search_path()
-    db.execute("""
-        SELECT DISTINCT account_id
-        FROM churn_analytics.event e
-        WHERE e.event_time >= %s - INTERVAL '90 days'
-    """, (latest_time,))
-    recent_accounts = [row[0] for row in db.cursor.fetchall()]
-    print(f"Found {len(recent_accounts):,} active accounts (events in last 90 days)")
-    
-    # Get metrics for latest time
-    db.execute("""
-        SELECT 
-            m.account_id,
-            m.metric_time,
-            n.metric_name,
-            m.metric_value
-        FROM churn_analytics.metric m
-        INNER JOIN churn_analytics.metric_name n 
-            ON m.metric_name_id = n.metric_name_id
-        WHERE m.metric_time = %s
-          AND m.account_id = ANY(%s)
-        ORDER BY m.account_id, n.metric_name
-    """, (latest_time, recent_accounts))
-    
-    results = db.cursor.fetchall()
-    
-    if not results:
+    # Get metrics for latest time, limited to active customers (accounts with
+    # events in the last 90 days) which are selected on the server.
+    # Stream through a server-side cursor so the full result never sits in
+    # memory as Python tuples; each batch becomes a small DataFrame
+    chunks = [
+        pd.DataFrame(rows, columns=['account_id', 'metric_name', 'metric_value'])
+        for rows in db.stream(load_sql('current_customer_dataset.sql'),
+                              {'latest_time': latest_time},
+                              itersize=FETCH_SIZE, name='metric_stream')
+    ]
+    
+    if not chunks:
         raise ValueError("No metrics found for latest time. Ensure metrics are calculated.")
     
-    # Convert to DataFrame
-    df = pd.DataFrame(results, columns=['account_id', 'metric_time', 'metric_name', 'metric_value'])
+    df = pd.concat(chunks, ignore_index=True)
     
     # Pivot: one row per customer, one column per metric
-    dataset = df.pivot_table(
-        index=['account_id', 'metric_time'],
-        columns='metric_name',
-        values='metric_value',
-        fill_value=0.0
-    ).reset_index()
-    
-    # Rename metric_time to last_metric_time for clarity
-    dataset = dataset.rename(columns={'metric_time': 'last_metric_time'})
+    # Scatter values straight into a dense float32 matrix using the
+    # categorical codes as row/column positions (missing metrics stay 0).
+    # Categories are sorted, so rows come out ordered by account_id
+    # regardless of the order the server returned them in
+    accounts = pd.Categorical(df['account_id'])
+    metrics = pd.Categorical(df['metric_name'])
+    values = np.zeros((len(accounts.categories), len(metrics.categories)), dtype=np.float32)
+    values[accounts.codes, metrics.codes] = df['metric_value'].to_numpy(dtype=np.float32)
+    
+    # All rows share the latest metric_time, kept as last_metric_time for clarity
+    index = pd.MultiIndex.from_arrays(
+        [accounts.categories, np.full(len(accounts.categories), latest_time)],
+        names=['account_id', 'last_metric_time']
+    )
+    dataset = pd.DataFrame(values, index=index,
+                           columns=pd.Index(metrics.categories, name='metric_name'))
     
-    # Set index to account_id and last_metric_time
-    dataset = dataset.set_index(['account_id', 'last_metric_time'])
+    # Downcast each metric column independently (NumPy releases the GIL)
+    memory_before = dataset.memory_usage().sum()
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        dataset = pd.concat(executor.map(downcast_column, (column for _, column in dataset.items())), axis=1)
+    dataset.columns.name = 'metric_name'
+    memory_after = dataset.memory_usage().sum()
     
     print(f"\nDataset created:")
     print(f"  Rows (customers): {len(dataset):,}")
     print(f"  Columns (metrics): {len(dataset.columns)}")
     print(f"  Columns: {', '.join(dataset.columns.tolist()[:10])}{'...' if len(dataset.columns) > 10 else ''}")
+    print(f"  Memory: {memory_before / 1024**2:,.1f} MB -> {memory_after / 1024**2:,.1f} MB after downcast")
     
     if output_path:
-        dataset.to_csv(output_path)
+        if Path(output_path).suffix == '.parquet':
+            # Typed, compressed columnar file; requires pyarrow (optional dependency)
+            dataset.to_parquet(output_path, engine='pyarrow', compression='snappy')
+        else:
+            # %.8g keeps every float32 integer count exact without printing the
+            # 17-digit float64 repr; writing in chunks bounds the formatting buffer
+            dataset.to_csv(output_path, float_format='%.8g', chunksize=100_000)
         print(f"\nSaved dataset to: {output_path}")
     
     return dataset
@@ -120,7 +137,9 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description='Create current customer dataset')
     parser.add_argument('--output', type=str, default='output/current_customer_dataset.csv',
-                       help='Output CSV file path')
+                       help='Output file path')
+    parser.add_argument('--format', type=str, choices=['csv', 'parquet'],
+                       help='Output format (defaults to the --output file extension)')
     parser.add_argument('--dbname', type=str, help='Database name')
     parser.add_argument('--user', type=str, help='Database user')
     parser.add_argument('--password', type=str, help='Database password')
@@ -132,6 +151,8 @@ if __name__ == "__main__":
     
     # Create output directory if needed
     output_path = Path(args.output)
+    if args.format:
+        output_path = output_path.with_suffix(f'.{args.format}')
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
     db = Database(
@@ -2,12 +2,34 @@
 Database connection and setup utilities for churn-data-pipeline
 """
 import os
+import threading
 import psycopg2
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
 from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from psycopg2 import sql
 from typing import Optional
 
 
+SQL_DIR = Path(__file__).parent.parent / 'sql'
+
+
+@lru_cache(maxsize=32)
+def load_sql(filename: str) -> str:
+    """
+    Read a query from the sql/ directory, caching the text after the first read
+    
+    Args:
+        filename: Name of the SQL file (e.g. 'insert_count_metric.sql')
+    
+    Returns:
+        SQL text of the file
+    """
+    return (SQL_DIR / filename).read_text()
+
+
 class Database:
     """Database connection and operations handler"""
     
@@ -17,7 +39,8 @@ class Database:
                  password: Optional[str] = None,
                  host: Optional[str] = None,
                  port: Optional[int] = None,
-                 schema: str = 'churn_analytics'):
+                 schema: str = 'churn_analytics',
+                 max_connections: int = 16):
         """
         Initialize database connection
         
@@ -28,6 +51,7 @@ class Database:
             host: Database host (defaults to CHURN_DB_HOST env var or 'localhost')
             port: Database port (defaults to 5432)
             schema: Schema name (defaults to 'churn_analytics')
+            max_connections: Maximum number of pooled connections handed out by acquire()
         """
         self.dbname = dbname or os.getenv('CHURN_DB', 'churn')
         self.user = user or os.getenv('CHURN_DB_USER', 'postgres')
@@ -36,35 +60,158 @@ class Database:
         self.port = port or int(os.getenv('CHURN_DB_PORT', '5432'))
         self.schema = schema
         
+        self.max_connections = max_connections
+        
         self.conn = None
         self.cursor = None
+        
+        # Connection pool for worker threads, opened on first acquire()
+        self.pool = None
+        self._pool_lock = threading.Lock()
+        self._pool_slots = threading.BoundedSemaphore(max_connections)
     
-    def connect(self):
-        """Establish database connection"""
-        self.conn = psycopg2.connect(
+    def connection_params(self) -> dict:
+        """
+        Keyword arguments for psycopg2.connect, shared by the main and pooled connections
+        
+        The search path is sent as a startup option, so every physical
+        connection starts in the schema without a separate SET round-trip.
+        The schema is double-quoted like sql.Identifier, then spaces and
+        backslashes are escaped for libpq's options string.
+        """
+        schema = '"' + self.schema.replace('"', '""') + '"'
+        schema = schema.replace('\\', '\\\\').replace(' ', '\\ ')
+        return dict(
             dbname=self.dbname,
             user=self.user,
             password=self.password,
             host=self.host,
-            port=self.port
+            port=self.port,
+            options=f'-c search_path={schema}'
         )
+    
+    def connect(self):
+        """Establish database connection, reusing it if already open"""
+        if self.conn and not self.conn.closed:
+            return self.conn
+        self.conn = psycopg2.connect(**self.connection_params())
         self.cursor = self.conn.cursor()
         return self.conn
     
     def close(self):
-        """Close database connection"""
+        """Close database connection and any pooled connections"""
         if self.cursor:
             self.cursor.close()
         if self.conn:
             self.conn.close()
+        if self.pool:
+            self.pool.closeall()
+            self.pool = None
+    
+    @contextmanager
+    def acquire(self):
+        """
+        Borrow a connection from the thread-safe pool for one unit of work
+        
+        Blocks while all `max_connections` connections are in use. The
+        transaction is committed when the block exits normally and rolled
+        back on error, then the connection goes back to the pool.
+        
+        Yields:
+            psycopg2 connection, separate from the main `conn`
+        """
+        with self._pool_lock:
+            if self.pool is None:
+                self.pool = ThreadedConnectionPool(
+                    1, self.max_connections, **self.connection_params()
+                )
+        
+        with self._pool_slots:
+            conn = self.pool.getconn()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self.pool.putconn(conn)
+    
+    @contextmanager
+    def pooled(self):
+        """
+        Database handle bound to a pooled connection, for use by one worker thread
+        
+        Works like this instance (execute, copy_to, stream, ...) but runs on
+        its own connection from acquire(), so several workers can query at
+        the same time. Commits on success; do not call close() on it.
+        
+        Yields:
+            Database instance using the borrowed connection
+        """
+        with self.acquire() as conn:
+            worker_db = Database(dbname=self.dbname, user=self.user, password=self.password,
+                                 host=self.host, port=self.port, schema=self.schema)
+            worker_db.conn = conn
+            worker_db.cursor = conn.cursor()
+            try:
+                yield worker_db
+            finally:
+                worker_db.cursor.close()
     
-    def execute(self, query: str, params: Optional[tuple] = None):
+    def execute(self, query: str, params: Optional[tuple | dict] = None):
         """Execute a SQL query"""
-        if not self.conn:
+        if not self.conn or self.conn.closed:
             self.connect()
         self.cursor.execute(query, params)
         return self.cursor
     
+    def stream(self, query: str, params: Optional[tuple | dict] = None,
+               itersize: int = 10000, name: str = 'stream'):
+        """
+        Run a query on a named (server-side) cursor and yield its rows in batches
+        
+        Only `itersize` rows are transferred and held in memory at a time,
+        instead of the whole result set as with execute() and fetchall().
+        
+        Args:
+            query: SQL query returning rows
+            params: Query parameters
+            itersize: Number of rows fetched per round-trip
+            name: Name of the server-side cursor
+        
+        Yields:
+            Lists of up to `itersize` row tuples
+        """
+        if not self.conn or self.conn.closed:
+            self.connect()
+        with self.conn.cursor(name=name) as cur:
+            cur.itersize = itersize
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(itersize)
+                if not rows:
+                    break
+                yield rows
+    
+    def copy_to(self, query: str, file, params: Optional[tuple | dict] = None):
+        """
+        Write the result of a query to a file as CSV with a header row
+        
+        The rows are produced by COPY ... TO STDOUT on the server and written
+        straight to the file, without building Python row tuples.
+        
+        Args:
+            query: SQL query returning rows (a trailing ';' is allowed)
+            file: Binary file-like object to write the CSV bytes to
+            params: Query parameters
+        """
+        if not self.conn or self.conn.closed:
+            self.connect()
+        # COPY takes no bind parameters, so they are interpolated client-side
+        query = self.cursor.mogrify(query, params).decode().strip().rstrip(';')
+        self.cursor.copy_expert(f"COPY (\n{query}\n) TO STDOUT WITH (FORMAT CSV, HEADER)", file)
+    
     def commit(self):
         """Commit transaction"""
         if self.conn:
@@ -79,13 +226,6 @@ class Database:
         self.commit()
         print(f"Schema '{self.schema}' created or already exists")
     
-    def set_search_path(self):
-        """Set search path to the schema"""
-        query = sql.SQL("SET search_path TO {}").format(
-            sql.Identifier(self.schema)
-        )
-        self.execute(query)
-    
     def __enter__(self):
         """Context manager entry"""
         self.connect()
@@ -2,19 +2,146 @@
 Calculate dataset statistics summary
 """
 import sys
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+# pyarrow (the optional parquet extra) also provides a multi-threaded CSV
+# parser; fall back to pandas' own C parser when it is not installed
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+
+# Quantiles reported in the summary, as (column label, q)
+QUANTILES = [('1%', 0.01), ('25%', 0.25), ('50%', 0.50), ('75%', 0.75), ('99%', 0.99)]
+
+# Rows per block when accumulating central moments (bounds float64 temporaries)
+STATS_BLOCK_ROWS = 200_000
+
+
+def read_dataset(data_set_path: str) -> pd.DataFrame:
+    """
+    Read a customer dataset written by create_current_dataset
+    
+    Args:
+        data_set_path: Path to CSV or Parquet dataset file
+    
+    Returns:
+        DataFrame indexed by account_id and last_metric_time
+    """
+    if Path(data_set_path).suffix == '.parquet':
+        return pd.read_parquet(data_set_path, engine='pyarrow')
+    
+    # Metric columns are read straight into float32 (first two are the index)
+    columns = pd.read_csv(data_set_path, nrows=0).columns
+    return pd.read_csv(data_set_path, index_col=[0, 1],
+                       dtype={column: np.float32 for column in columns[2:]},
+                       engine=CSV_ENGINE)
+
+
+SUMMARY_COLUMNS = ['count', 'nonzero', 'mean', 'std', 'skew', 'min',
+                   *(label for label, _ in QUANTILES), 'max']
+
+
+def pandas_summary_stats(churn_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the summary statistics of every column with pandas
+    
+    Skips missing values the way describe/skew/quantile do; used for
+    datasets the fast path in summary_stats cannot handle.
+    
+    Args:
+        churn_data: Dataset with one numeric column per metric
+    
+    Returns:
+        DataFrame indexed by column name with the SUMMARY_COLUMNS columns
+    """
+    summary = churn_data.describe().transpose()
+    summary['skew'] = churn_data.skew()
+    for label, q in QUANTILES:
+        summary[label] = churn_data.quantile(q=q)
+    summary['nonzero'] = (churn_data.astype(bool).sum(axis=0) / churn_data.shape[0]) * 100
+    return summary[SUMMARY_COLUMNS]
+
+
+def summary_stats(churn_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the summary statistics of every column in one pass over the data
+    
+    Matches pandas' describe/skew/quantile definitions (sample std, adjusted
+    Fisher-Pearson skew, linear quantile interpolation). Datasets with
+    missing values or fewer than three rows go through pandas_summary_stats
+    instead, since the single pass assumes every value is present.
+    
+    Args:
+        churn_data: Dataset with one numeric column per metric
+    
+    Returns:
+        DataFrame indexed by column name with the SUMMARY_COLUMNS columns
+    """
+    values = churn_data.to_numpy(dtype=np.float32)
+    n = values.shape[0]
+    if n < 3:
+        return pandas_summary_stats(churn_data)
+    
+    # Sums are accumulated in float64 so float32 data does not lose precision
+    mean = values.mean(axis=0, dtype=np.float64)
+    # A missing value anywhere in a column makes its mean NaN
+    if np.isnan(mean).any():
+        return pandas_summary_stats(churn_data)
+    m2 = np.zeros(values.shape[1])
+    m3 = np.zeros(values.shape[1])
+    nonzero = np.zeros(values.shape[1], dtype=np.int64)
+    minimum = np.full(values.shape[1], np.inf, dtype=np.float32)
+    maximum = np.full(values.shape[1], -np.inf, dtype=np.float32)
+    # Every other per-column aggregate is taken from the same block while
+    # it is in cache; the cube reuses the squares buffer in place
+    for start in range(0, n, STATS_BLOCK_ROWS):
+        block = values[start:start + STATS_BLOCK_ROWS]
+        deviation = block - mean
+        power = deviation * deviation
+        m2 += power.sum(axis=0)
+        power *= deviation
+        m3 += power.sum(axis=0)
+        nonzero += np.count_nonzero(block, axis=0)
+        np.minimum(minimum, block.min(axis=0), out=minimum)
+        np.maximum(maximum, block.max(axis=0), out=maximum)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        std = np.sqrt(m2 / (n - 1))
+        skew = np.sqrt(n * (n - 1)) / (n - 2) * (m3 / n) / (m2 / n) ** 1.5
+    # pandas reports zero skew for constant columns
+    skew = np.where(m2 == 0, 0.0, skew)
+    
+    summary = pd.DataFrame({
+        'count': float(n),
+        'nonzero': nonzero / n * 100,
+        'mean': mean,
+        'std': std,
+        'skew': skew,
+        'min': minimum,
+    }, index=churn_data.columns)
+    # All quantiles from a single partition of each column
+    quantiles = np.quantile(values, [q for _, q in QUANTILES], axis=0)
+    for (label, _), quantile in zip(QUANTILES, quantiles):
+        summary[label] = quantile
+    summary['max'] = maximum
+    
+    return summary
+
 
 def dataset_stats(data_set_path: str):
     """
     Calculate comprehensive statistics for a customer dataset
     
     Args:
-        data_set_path: Path to CSV dataset file
+        data_set_path: Path to CSV or Parquet dataset file
     
     Returns:
-        DataFrame with summary statistics
+        Tuple of (DataFrame with summary statistics, number of rows in the dataset)
     """
     if not Path(data_set_path).is_file():
         raise FileNotFoundError(f'"{data_set_path}" is not a valid dataset path')
@@ -25,7 +152,7 @@ def dataset_stats(data_set_path: str):
     print(f"Loading dataset from: {data_set_path}")
     
     # Read dataset with account_id and last_metric_time as index
-    churn_data = pd.read_csv(data_set_path, index_col=[0, 1])
+    churn_data = read_dataset(data_set_path)
     
     print(f"Dataset shape: {churn_data.shape[0]:,} rows × {churn_data.shape[1]} columns")
     
@@ -33,24 +160,12 @@ def dataset_stats(data_set_path: str):
     if 'is_churn' in churn_data.columns:
         churn_data['is_churn'] = churn_data['is_churn'].astype(float)
     
-    # Calculate basic statistics
-    summary = churn_data.describe()
-    summary = summary.transpose()
-    
-    # Add additional statistics
-    summary['skew'] = churn_data.skew()
-    summary['1%'] = churn_data.quantile(q=0.01)
-    summary['99%'] = churn_data.quantile(q=0.99)
-    
-    # Calculate percentage of customers with nonzero values
-    summary['nonzero'] = (churn_data.astype(bool).sum(axis=0) / churn_data.shape[0]) * 100
-    
-    # Reorder columns for standard format
-    summary = summary[['count', 'nonzero', 'mean', 'std', 'skew', 'min', '1%', '25%', '50%', '75%', '99%', 'max']]
+    # Calculate all statistics, including percentage of customers with nonzero values
+    summary = summary_stats(churn_data)
     summary.columns = summary.columns.str.replace("%", "pct")
     
     # Save results
-    save_path = str(data_set_path).replace('.csv', '_summarystats.csv')
+    save_path = str(Path(data_set_path).with_name(Path(data_set_path).stem + '_summarystats.csv'))
     summary.to_csv(save_path, header=True)
     print(f'\nSaved summary statistics to: {save_path}')
     
@@ -75,7 +190,7 @@ def dataset_stats(data_set_path: str):
         print(f"  Typical value (mean): {mean_val:.2f}")
         print(f"  Maximum value: {max_val:.2f}")
     
-    return summary
+    return summary, len(churn_data)
 
 
 if __name__ == "__main__":
@@ -83,12 +198,12 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description='Calculate dataset statistics')
     parser.add_argument('dataset_path', type=str,
-                       help='Path to CSV dataset file')
+                       help='Path to CSV or Parquet dataset file')
     
     args = parser.parse_args()
     
     try:
-        summary = dataset_stats(args.dataset_path)
+        dataset_stats(args.dataset_path)
         print(f"\n{'='*60}")
         print("Statistics calculation complete!")
         print(f"{'='*60}")
@@ -1,38 +1,263 @@
 """
 Load CSV data into PostgreSQL database
 """
+import numpy as np
 import pandas as pd
 import sys
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 try:
-    from .database import Database
+    from .database import Database, load_sql
 except ImportError:
-    from database import Database
+    from database import Database, load_sql
 from psycopg2.extras import execute_values
 from psycopg2 import sql
 
 
-def load_csv_to_database(csv_path: str, 
-                        db: Database,
-                        batch_size: int = 10000,
-                        chunk_size: int = 100000):
+# Text columns are stored in Arrow string buffers when pyarrow (the optional
+# parquet extra) is installed, instead of one Python object per value
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STRING_DTYPE = 'string'
+
+# Columns read from the input CSV and their types; anything else is skipped.
+# Text columns use the nullable string dtype, so empty values are <NA> and
+# are written as NULL by to_csv(na_rep='\\N')
+CSV_COLUMNS = ['account_id', 'event_time', 'event_type', 'product_id', 'additional_data']
+CSV_DTYPES = {'account_id': STRING_DTYPE, 'event_type': 'category',
+              'product_id': STRING_DTYPE, 'additional_data': STRING_DTYPE}
+# Columns every input CSV must have
+REQUIRED_COLUMNS = ['account_id', 'event_time', 'event_type']
+
+# Event table columns, in the order they are written to COPY
+EVENT_COLUMNS = ['account_id', 'event_time', 'event_type_id', 'product_id', 'additional_data']
+
+# Statements run by the loader, built once at import time
+SELECT_EVENT_TYPES = """
+    SELECT event_type_id, event_type_name
+    FROM churn_analytics.event_type
+"""
+
+INSERT_EVENT_TYPES = """
+    INSERT INTO churn_analytics.event_type (event_type_name)
+    VALUES %s
+    ON CONFLICT (event_type_name) DO NOTHING
+"""
+
+SELECT_EVENT_TYPE_IDS = """
+    SELECT event_type_id, event_type_name
+    FROM churn_analytics.event_type
+    WHERE event_type_name = ANY(%s)
+"""
+
+COPY_EVENT_STAGE = """
+    COPY churn_analytics.event_stage
+    (account_id, event_time, event_type_id, product_id, additional_data)
+    FROM STDIN WITH (FORMAT CSV, NULL '\\N')
+"""
+
+MERGE_EVENT_STAGE = """
+    INSERT INTO churn_analytics.event
+    (account_id, event_time, event_type_id, product_id, additional_data)
+    SELECT account_id, event_time, event_type_id, product_id, additional_data
+    FROM churn_analytics.event_stage
+    ON CONFLICT (account_id, event_time, event_type_id) DO NOTHING
+"""
+
+# Secondary indexes on event (see create_schema.sql). With drop_indexes they
+# are dropped while staged rows are merged and rebuilt afterwards; the
+# primary key always stays, ON CONFLICT needs it
+EVENT_INDEXES = ['idx_event_account_id', 'idx_event_account_time', 'idx_event_time',
+                 'idx_event_type', 'idx_event_product_id']
+
+
+class CsvChunkStream:
+    """
+    File-like reader that serializes a DataFrame chunk to CSV on demand
+    
+    COPY pulls data through read(); each call formats only the next
+    `slice_rows` rows, so the chunk is streamed to the server without ever
+    building its whole CSV text in memory. Formatting and sending still
+    alternate in the calling thread.
+    """
+    
+    def __init__(self, chunk: pd.DataFrame, slice_rows: int = 10000):
+        """
+        Args:
+            chunk: Prepared event rows (see prepare_chunk)
+            slice_rows: Number of rows formatted per read() call
+        """
+        self.chunk = chunk
+        self.slice_rows = slice_rows
+        self.position = 0
+    
+    def read(self, size: int = -1) -> str:
+        """
+        Return CSV text for the next slice of rows
+        
+        Args:
+            size: Ignored; every call returns one whole slice, which may be
+                longer than the block size copy_expert asks for (it writes
+                whatever read() returns)
+        
+        Returns:
+            CSV lines for up to `slice_rows` rows, or '' when exhausted
+        """
+        if self.position >= len(self.chunk):
+            return ''
+        rows = self.chunk.iloc[self.position:self.position + self.slice_rows]
+        self.position += self.slice_rows
+        return rows.to_csv(columns=EVENT_COLUMNS, index=False, header=False, na_rep='\\N')
+
+
+def read_event_csv(csv_path: str, chunk_size: int):
+    """
+    Read the event CSV in chunks with explicit column types
+    
+    Args:
+        csv_path: Path to CSV file
+        chunk_size: Number of rows per chunk
+    
+    Returns:
+        Iterator over DataFrame chunks
+    """
+    # Checked on the header first, since parse_dates fails on its own
+    # (less helpful) error when event_time is missing
+    columns = pd.read_csv(csv_path, nrows=0).columns
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing_cols:
+        raise ValueError(f"CSV missing required columns: {missing_cols}. Found columns: {columns.tolist()}")
+    
+    return pd.read_csv(csv_path,
+                       chunksize=chunk_size,
+                       usecols=lambda column: column in CSV_COLUMNS,
+                       dtype=CSV_DTYPES,
+                       parse_dates=['event_time'],
+                       date_format='ISO8601')
+
+
+def copy_to_stage(db: Database, chunk: pd.DataFrame):
+    """
+    COPY prepared event rows into the staging table on a pooled connection
+    
+    Args:
+        db: Database instance
+        chunk: DataFrame with EVENT_COLUMNS (see prepare_chunk)
+    """
+    with db.acquire() as conn, conn.cursor() as cur:
+        # Nothing staged needs to survive a crash, so don't wait for the
+        # WAL flush when acquire() commits (the table is UNLOGGED anyway)
+        cur.execute("SET LOCAL synchronous_commit TO OFF")
+        cur.copy_expert(COPY_EVENT_STAGE, CsvChunkStream(chunk))
+
+
+def prepare_chunk(chunk: pd.DataFrame, db: Database, event_type_map: dict) -> pd.DataFrame:
+    """
+    Validate a CSV chunk and convert it to event table rows
+    
+    Event types not in `event_type_map` are inserted and committed, and the
+    mapping is updated in place.
+    
+    Args:
+        chunk: DataFrame chunk from read_event_csv
+        db: Database instance
+        event_type_map: Dictionary mapping event_type_name to event_type_id
+    
+    Returns:
+        DataFrame with EVENT_COLUMNS, invalid rows dropped
     """
-    Load CSV file into PostgreSQL database.
+    # Check required columns
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+    if missing_cols:
+        raise ValueError(f"CSV missing required columns: {missing_cols}. Found columns: {chunk.columns.tolist()}")
+    
+    # Insert event types not seen before and add their ids to the mapping
+    new_types = sorted(set(chunk['event_type'].dropna().unique()) - event_type_map.keys())
+    if new_types:
+        execute_values(db.cursor, INSERT_EVENT_TYPES,
+                       [(event_type_name,) for event_type_name in new_types],
+                       page_size=len(new_types))
+        db.execute(SELECT_EVENT_TYPE_IDS, (new_types,))
+        event_type_map.update({row[1]: row[0] for row in db.cursor.fetchall()})
+        db.commit()
+        print(f"Registered {len(new_types)} new event types")
+    
+    # Map event_type to event_type_id through the categorical codes: one dict
+    # lookup per distinct type, then a single NumPy take over the rows.
+    # Missing event types have code -1, which picks the trailing -1 id
+    event_types = chunk['event_type'].astype('category').cat
+    category_ids = np.array([event_type_map[name] for name in event_types.categories] + [-1],
+                            dtype=np.int64)
+    chunk['event_type_id'] = category_ids[event_types.codes.to_numpy()]
+    
+    # Prepare data for insertion
+    # event_time is parsed while reading; a chunk with unparseable values
+    # comes back as text and is coerced here (invalid values become NaT)
+    if not pd.api.types.is_datetime64_any_dtype(chunk['event_time']):
+        chunk['event_time'] = pd.to_datetime(chunk['event_time'], errors='coerce')
+    
+    # Handle missing product_id and additional_data columns
+    if 'product_id' not in chunk.columns:
+        chunk['product_id'] = None
+    
+    if 'additional_data' not in chunk.columns:
+        chunk['additional_data'] = None
+    
+    # Filter out rows with invalid event_time or event_type_id
+    chunk = chunk[chunk['event_type_id'].to_numpy() >= 0]
+    chunk = chunk.dropna(subset=['event_time', 'account_id'])
+    
+    return chunk
+
+
+def run_schema_sql(db: Database):
+    """
+    Run create_schema.sql statement by statement (all are IF NOT EXISTS)
+    
+    The caller is responsible for committing the transaction.
+    
+    Args:
+        db: Database instance
     """
+    # Split by semicolons and execute each statement
+    for statement in load_sql('create_schema.sql').split(';'):
+        statement = statement.strip()
+        if statement:
+            db.execute(statement)
+
+
+def load_csv_to_database(csv_path: str, 
+                        db: Database,
+                        chunk_size: int = 100000,
+                        workers: int = 4,
+                        drop_indexes: bool = False):
     """
     Load CSV file into PostgreSQL database
     
+    Chunks are streamed with COPY into an UNLOGGED staging table, which is
+    merged into the event table once at the end, skipping rows that
+    already exist. The CSV is read and prepared in this thread while up to
+    `workers` pooled connections (see Database.acquire) run the COPYs
+    concurrently.
+    
     Args:
         csv_path: Path to CSV file
         db: Database instance
-        batch_size: Number of rows to insert per batch
-        chunk_size: Number of rows to read from CSV at a time
+        chunk_size: Number of rows to read from CSV (and COPY) at a time
+        workers: Number of connections copying chunks in parallel
+        drop_indexes: Drop the secondary event indexes during the merge and
+            rebuild them afterwards. Only pays off when the file is large
+            compared to the existing table (e.g. the initial load); the
+            rebuild covers the whole table and locks it meanwhile
     """
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    
     print(f"Loading data from {csv_path}...")
     
     # Create schema and tables
     db.create_schema()
-    db.set_search_path()
     
     # Check if event table exists and has wrong column types
     # If account_id is INTEGER but should be TEXT, drop and recreate
@@ -51,108 +276,77 @@ def load_csv_to_database(csv_path: str,
         db.commit()
     
     # Read and execute schema creation SQL
-    schema_sql_path = Path(__file__).parent.parent / 'sql' / 'create_schema.sql'
-    with open(schema_sql_path, 'r') as f:
-        schema_sql = f.read()
-        # Split by semicolons and execute each statement
-        for statement in schema_sql.split(';'):
-            statement = statement.strip()
-            if statement:
-                db.execute(statement)
-        db.commit()
-    
-    # First, get unique event types and insert them
-    print("Extracting unique event types...")
-    event_types = set()
+    run_schema_sql(db)
+    db.commit()
     
-    # Read CSV in chunks to get unique event types
-    # Try to infer column names from first chunk
-    chunk_iter = pd.read_csv(csv_path, chunksize=chunk_size, low_memory=False)
-    first_chunk = next(chunk_iter)
+    # Load known event types; new ones are registered as chunks are read
+    event_type_map = {}
+    for rows in db.stream(SELECT_EVENT_TYPES, name='event_type_stream'):
+        event_type_map.update({row[1]: row[0] for row in rows})
+    print(f"Found {len(event_type_map)} existing event types")
     
-    # Check required columns
-    required_cols = ['account_id', 'event_time', 'event_type']
-    missing_cols = [col for col in required_cols if col not in first_chunk.columns]
-    if missing_cols:
-        raise ValueError(f"CSV missing required columns: {missing_cols}. Found columns: {first_chunk.columns.tolist()}")
-    
-    # Extract event types
-    event_types.update(first_chunk['event_type'].unique())
-    
-    # Continue reading remaining chunks
-    for chunk in chunk_iter:
-        event_types.update(chunk['event_type'].unique())
-    
-    print(f"Found {len(event_types)} unique event types")
-    
-    # Insert event types
-    db.set_search_path()
-    for event_type_name in sorted(event_types):
-        query = sql.SQL("""
-            INSERT INTO churn_analytics.event_type (event_type_name)
-            VALUES (%s)
-            ON CONFLICT (event_type_name) DO NOTHING
-        """)
-        db.execute(query, (event_type_name,))
+    # Stage events in an UNLOGGED table (no WAL, no indexes) and skip the
+    # WAL flush wait on commit for this session; nothing in the staging
+    # table needs to survive a crash
+    db.execute("SET synchronous_commit TO OFF")
+    db.execute("DROP TABLE IF EXISTS churn_analytics.event_stage")
+    db.execute("""
+        CREATE UNLOGGED TABLE churn_analytics.event_stage
+        (LIKE churn_analytics.event INCLUDING DEFAULTS)
+    """)
     db.commit()
-    print("Event types inserted")
-    
-    # Create mapping dictionary
-    query = sql.SQL("SELECT event_type_id, event_type_name FROM churn_analytics.event_type")
-    db.execute(query)
-    event_type_map = {row[1]: row[0] for row in db.cursor.fetchall()}
-    print(f"Created event type mapping with {len(event_type_map)} types")
     
-    # Now load events in batches
-    print("Loading events...")
+    # Now load events chunk by chunk
+    print(f"Loading events with {workers} COPY workers...")
     total_rows = 0
-    chunk_iter = pd.read_csv(csv_path, chunksize=chunk_size, low_memory=False)
-    
-    for chunk_num, chunk in enumerate(chunk_iter):
-        # Map event_type to event_type_id
-        chunk['event_type_id'] = chunk['event_type'].map(event_type_map)
-        
-        # Prepare data for insertion
-        # Convert account_id to string (in case it's read as numeric)
-        chunk['account_id'] = chunk['account_id'].astype(str)
-        
-        # Convert event_time to datetime if needed
-        chunk['event_time'] = pd.to_datetime(chunk['event_time'], errors='coerce')
-        
-        # Handle missing product_id and additional_data columns
-        if 'product_id' not in chunk.columns:
-            chunk['product_id'] = None
-        else:
-            # Convert product_id to string if present
-            chunk['product_id'] = chunk['product_id'].astype(str).replace('nan', None)
-        
-        if 'additional_data' not in chunk.columns:
-            chunk['additional_data'] = None
-        
-        # Filter out rows with invalid event_time or event_type_id
-        chunk = chunk.dropna(subset=['event_time', 'event_type_id', 'account_id'])
-        
-        # Select columns in the right order
-        insert_data = chunk[['account_id', 'event_time', 'event_type_id', 'product_id', 'additional_data']].values.tolist()
-        
-        # Insert in batches
-        for i in range(0, len(insert_data), batch_size):
-            batch = insert_data[i:i+batch_size]
-            query = sql.SQL("""
-                INSERT INTO churn_analytics.event 
-                (account_id, event_time, event_type_id, product_id, additional_data)
-                VALUES %s
-                ON CONFLICT (account_id, event_time, event_type_id) DO NOTHING
-            """)
-            execute_values(db.cursor, query, batch)
-            db.commit()
-            total_rows += len(batch)
-            if total_rows % 100000 == 0:
-                print(f"Loaded {total_rows:,} events...")
+    pending = []
+    chunk_iter = read_event_csv(csv_path, chunk_size)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for chunk_num, chunk in enumerate(chunk_iter):
+            chunk = prepare_chunk(chunk, db, event_type_map)
+            total_rows += len(chunk)
+            
+            # The worker serializes the rows to CSV as COPY consumes them
+            pending.append(executor.submit(copy_to_stage, db, chunk))
+            
+            # Keep at most two chunks per worker in memory
+            while len(pending) >= 2 * workers:
+                pending.pop(0).result()
+            
+            print(f"Processed chunk {chunk_num + 1}, total rows: {total_rows:,}")
         
-        print(f"Processed chunk {chunk_num + 1}, total rows: {total_rows:,}")
+        for future in pending:
+            future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    
+    # Merge staged events in one statement; duplicates (in the file or
+    # already in the table) are skipped by the primary key.
+    # Dropping, merging and rebuilding happen in one transaction, so a
+    # failed merge leaves the indexes in place
+    print(f"Merging {total_rows:,} staged events into the event table...")
+    db.execute("SET LOCAL work_mem = '256MB'")
+    db.execute("SET LOCAL maintenance_work_mem = '512MB'")
+    if drop_indexes:
+        for index_name in EVENT_INDEXES:
+            db.execute(sql.SQL("DROP INDEX IF EXISTS churn_analytics.{}").format(
+                sql.Identifier(index_name)
+            ))
+    db.execute(MERGE_EVENT_STAGE)
+    inserted_rows = db.cursor.rowcount
+    if drop_indexes:
+        print("Rebuilding event indexes...")
+        run_schema_sql(db)
+    db.execute("DROP TABLE churn_analytics.event_stage")
+    db.commit()
+    db.execute("RESET synchronous_commit")
+    
+    # Refresh planner statistics after the bulk change
+    db.execute("ANALYZE churn_analytics.event")
+    db.commit()
     
-    print(f"Data loading complete! Total events loaded: {total_rows:,}")
+    print(f"Data loading complete! Total events loaded: {total_rows:,} ({inserted_rows:,} new)")
     
     # Print summary statistics
     db.execute("SELECT COUNT(*) FROM churn_analytics.event")
@@ -175,7 +369,12 @@ if __name__ == "__main__":
     parser.add_argument('--host', type=str, default='localhost', help='Database host')
     parser.add_argument('--port', type=int, default=5432, help='Database port')
     parser.add_argument('--schema', type=str, default='churn_analytics', help='Schema name')
-    parser.add_argument('--batch-size', type=int, default=10000, help='Batch size for inserts')
+    parser.add_argument('--chunk-size', type=int, default=100000,
+                       help='Number of CSV rows loaded per COPY')
+    parser.add_argument('--workers', type=int, default=4,
+                       help='Number of parallel COPY connections')
+    parser.add_argument('--drop-indexes', action='store_true',
+                       help='Drop and rebuild event indexes around the merge (for large initial loads)')
     
     args = parser.parse_args()
     
@@ -189,7 +388,8 @@ if __name__ == "__main__":
     )
     
     try:
-        load_csv_to_database(args.csv_path, db, batch_size=args.batch_size)
+        load_csv_to_database(args.csv_path, db, chunk_size=args.chunk_size,
+                             workers=args.workers, drop_indexes=args.drop_indexes)
     except Exception as e:
         print(f"Error loading data: {e}", file=sys.stderr)
         raise
@@ -1,13 +1,16 @@
 """
 Analyze metrics: coverage, statistics over time, and visualizations
 """
+import io
 import sys
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from pathlib import Path
 try:
-    from .database import Database
+    from .database import Database, load_sql
 except ImportError:
-    from database import Database
+    from database import Database, load_sql
 from psycopg2 import sql
 
 
@@ -31,26 +34,21 @@ def calculate_metric_coverage(db: Database,
     print("Metric Coverage Analysis")
     print(f"{'='*60}")
     
-    sql_path = Path(__file__).parent.parent / 'sql' / 'metric_coverage.sql'
-    with open(sql_path, 'r') as f:
-        query = f.read()
-    
-    query = query.replace('%from_yyyy-mm-dd', start_date)
-    query = query.replace('%to_yyyy-mm-dd', end_date)
-    
-    db.set_search_path()
-    db.execute(query)
-    results = db.cursor.fetchall()
-    
-    df = pd.DataFrame(results, columns=[
-        'metric_name', 'count_with_metric', 'n_account', 'pcnt_with_metric',
-        'avg_value', 'min_value', 'max_value', 'earliest_metric', 'last_metric'
-    ])
+    # The server formats the result as CSV (COPY ... TO STDOUT); the same
+    # bytes are saved as-is and parsed into the DataFrame
+    buffer = io.BytesIO()
+    db.copy_to(load_sql('metric_coverage.sql'), buffer,
+               {'start_date': start_date, 'end_date': end_date})
     
     if output_path:
-        df.to_csv(output_path, index=False)
+        Path(output_path).write_bytes(buffer.getvalue())
         print(f"\nSaved coverage results to {output_path}")
     
+    buffer.seek(0)
+    # Metric names are kept as text, even ones like "NA" or "123"
+    df = pd.read_csv(buffer, dtype={'metric_name': str}, keep_default_na=False,
+                     parse_dates=['earliest_metric', 'last_metric'])
+    
     # Print summary
     print(f"\nTotal metrics: {len(df)}")
     print(f"\nMetric Coverage Summary:")
@@ -59,6 +57,54 @@ def calculate_metric_coverage(db: Database,
     return df
 
 
+def fetch_metric_stats_over_time(db: Database,
+                                 metric_name: str,
+                                 start_date: str,
+                                 end_date: str) -> bytes:
+    """
+    Run the metric statistics over time query
+    
+    Only talks to the database, so it is safe to call from worker threads
+    on pooled connections.
+    
+    Args:
+        db: Database instance
+        metric_name: Name of metric to analyze
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+    
+    Returns:
+        Query result as CSV with a header row, formatted by the server
+    """
+    buffer = io.BytesIO()
+    db.copy_to(load_sql('metric_stats_over_time.sql'), buffer, {
+        'start_date': start_date,
+        'end_date': end_date,
+        'metric_name': metric_name,
+    })
+    return buffer.getvalue()
+
+
+def read_metric_stats(csv_data: bytes, output_path: str = None):
+    """
+    Parse metric statistics fetched by fetch_metric_stats_over_time
+    
+    Args:
+        csv_data: CSV result of the metric stats query
+        output_path: Optional path to save CSV results
+    
+    Returns:
+        DataFrame with stats over time
+    """
+    # The server formats the CSV; the bytes are written as-is, with no
+    # pandas CSV writer pass
+    if output_path:
+        Path(output_path).write_bytes(csv_data)
+        print(f"Saved metric stats to {output_path}")
+    
+    return pd.read_csv(io.BytesIO(csv_data), parse_dates=['calc_date'])
+
+
 def get_metric_stats_over_time(db: Database,
                                metric_name: str,
                                start_date: str,
@@ -77,25 +123,8 @@ def get_metric_stats_over_time(db: Database,
     Returns:
         DataFrame with stats over time
     """
-    sql_path = Path(__file__).parent.parent / 'sql' / 'metric_stats_over_time.sql'
-    with open(sql_path, 'r') as f:
-        query = f.read()
-    
-    query = query.replace('%from_yyyy-mm-dd', start_date)
-    query = query.replace('%to_yyyy-mm-dd', end_date)
-    query = query.replace('%metric2measure', metric_name)
-    
-    db.set_search_path()
-    db.execute(query)
-    results = db.cursor.fetchall()
-    
-    df = pd.DataFrame(results, columns=['calc_date', 'avg', 'n_calc', 'min', 'max'])
-    
-    if output_path:
-        df.to_csv(output_path, index=False)
-        print(f"Saved metric stats to {output_path}")
-    
-    return df
+    csv_data = fetch_metric_stats_over_time(db, metric_name, start_date, end_date)
+    return read_metric_stats(csv_data, output_path)
 
 
 def visualize_metric_qa(qa_data_path: str, metric_name: str, output_dir: str = None):
@@ -107,50 +136,35 @@ def visualize_metric_qa(qa_data_path: str, metric_name: str, output_dir: str = N
         metric_name: Name of metric for title
         output_dir: Directory to save plot
     """
-    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
     from math import ceil
     
     qa_data_df = pd.read_csv(qa_data_path)
     qa_data_df['calc_date'] = pd.to_datetime(qa_data_df['calc_date'])
-    
-    plt.figure(figsize=(12, 10))
-    
-    # Plot max
-    plt.subplot(4, 1, 1)
-    plt.plot('calc_date', 'max', data=qa_data_df, marker='', linestyle='-', 
-             color='black', linewidth=2, label='max')
-    plt.ylim(0, ceil(1.1 * qa_data_df['max'].dropna().max()) if qa_data_df['max'].notna().any() else 1)
-    plt.legend()
-    plt.ylabel('Max Value')
-    
-    # Plot avg
-    plt.subplot(4, 1, 2)
-    plt.plot('calc_date', 'avg', data=qa_data_df, marker='', linestyle='--', 
-             color='black', linewidth=2, label='avg')
-    plt.ylim(0, ceil(1.1 * qa_data_df['avg'].dropna().max()) if qa_data_df['avg'].notna().any() else 1)
-    plt.legend()
-    plt.ylabel('Average Value')
-    
-    # Plot min
-    plt.subplot(4, 1, 3)
-    plt.plot('calc_date', 'min', data=qa_data_df, marker='', linestyle='-.', 
-             color='black', linewidth=2, label='min')
-    plt.ylim(0, ceil(1.1 * qa_data_df['min'].dropna().max()) if qa_data_df['min'].notna().any() else 1)
-    plt.legend()
-    plt.ylabel('Min Value')
-    
-    # Plot count
-    plt.subplot(4, 1, 4)
-    plt.plot('calc_date', 'n_calc', data=qa_data_df, marker='', linestyle=':', 
-             color='black', linewidth=2, label='n_calc')
-    plt.ylim(0, ceil(1.1 * qa_data_df['n_calc'].dropna().max()) if qa_data_df['n_calc'].notna().any() else 1)
-    plt.legend()
-    plt.ylabel('Count')
-    plt.xlabel('Date')
-    
-    plt.suptitle(f'{metric_name} Metric QA', fontsize=14, y=0.995)
-    plt.gca().figure.autofmt_xdate()
-    plt.tight_layout()
+    calc_dates = qa_data_df['calc_date'].to_numpy()
+    
+    # A standalone Figure renders with Agg and touches no pyplot global state
+    fig = Figure(figsize=(12, 10))
+    axes = fig.subplots(4, 1, sharex=True)
+    
+    panels = [
+        ('max', '-', 'Max Value'),
+        ('avg', '--', 'Average Value'),
+        ('min', '-.', 'Min Value'),
+        ('n_calc', ':', 'Count'),
+    ]
+    for ax, (column, linestyle, ylabel) in zip(axes, panels):
+        values = qa_data_df[column].to_numpy(dtype=float)
+        ax.plot(calc_dates, values, marker='', linestyle=linestyle,
+                color='black', linewidth=2, label=column)
+        ax.set_ylim(0, ceil(1.1 * np.nanmax(values)) if qa_data_df[column].notna().any() else 1)
+        ax.legend()
+        ax.set_ylabel(ylabel)
+    axes[-1].set_xlabel('Date')
+    
+    fig.suptitle(f'{metric_name} Metric QA', fontsize=14, y=0.995)
+    fig.autofmt_xdate()
+    fig.tight_layout()
     
     if output_dir:
         output_path = Path(output_dir) / f'{metric_name}_metric_qa.png'
@@ -158,24 +172,17 @@ def visualize_metric_qa(qa_data_path: str, metric_name: str, output_dir: str = N
         output_path = Path(qa_data_path).parent / f'{metric_name}_metric_qa.png'
     
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(output_path, dpi=150)
+    fig.savefig(output_path, dpi=150)
     print(f'Saving metric QA plot to {output_path}')
-    plt.close()
 
 
-def analyze_metric_from_db(db: Database,
-                          metric_name: str,
-                          start_date: str,
-                          end_date: str,
-                          output_dir: str = None):
+def report_metric_stats(csv_data: bytes, metric_name: str, output_dir: str = None):
     """
-    Get metric stats from database and create visualization
+    Save fetched metric stats, create the visualization and print a summary
     
     Args:
-        db: Database instance
+        csv_data: CSV result from fetch_metric_stats_over_time
         metric_name: Name of metric to analyze
-        start_date: Start date in YYYY-MM-DD format
-        end_date: End date in YYYY-MM-DD format
         output_dir: Directory to save outputs
     """
     if output_dir:
@@ -185,8 +192,7 @@ def analyze_metric_from_db(db: Database,
     else:
         csv_path = Path(f'{metric_name}_stats_over_time.csv')
     
-    # Get data from database
-    df = get_metric_stats_over_time(db, metric_name, start_date, end_date, str(csv_path))
+    df = read_metric_stats(csv_data, str(csv_path))
     
     # Create visualization
     visualize_metric_qa(str(csv_path), metric_name, output_dir)
@@ -201,6 +207,62 @@ def analyze_metric_from_db(db: Database,
     print(f"Min value range: {df['min'].min():.2f} to {df['min'].max():.2f}")
 
 
+def analyze_metric_from_db(db: Database,
+                          metric_name: str,
+                          start_date: str,
+                          end_date: str,
+                          output_dir: str = None):
+    """
+    Get metric stats from database and create visualization
+    
+    Args:
+        db: Database instance
+        metric_name: Name of metric to analyze
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        output_dir: Directory to save outputs
+    """
+    csv_data = fetch_metric_stats_over_time(db, metric_name, start_date, end_date)
+    report_metric_stats(csv_data, metric_name, output_dir)
+
+
+def analyze_metrics_from_db(db: Database,
+                            metric_names: list,
+                            start_date: str,
+                            end_date: str,
+                            output_dir: str = None,
+                            workers: int = 8):
+    """
+    Run analyze_metric_from_db for several metrics, querying them concurrently
+    
+    Each metric's query runs in its own thread on a pooled connection (see
+    Database.pooled), so the queries run side by side on the server. Files,
+    plots and printed output are produced in the calling thread, in the
+    order of metric_names, exactly as analyzing the metrics one by one.
+    
+    Args:
+        db: Database instance
+        metric_names: Names of the metrics to analyze
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        output_dir: Directory to save outputs
+        workers: Maximum number of metrics analyzed at the same time
+    """
+    if len(metric_names) == 1:
+        analyze_metric_from_db(db, metric_names[0], start_date, end_date, output_dir)
+        return
+    
+    def fetch(metric_name: str) -> bytes:
+        with db.pooled() as worker_db:
+            return fetch_metric_stats_over_time(worker_db, metric_name, start_date, end_date)
+    
+    with ThreadPoolExecutor(max_workers=min(workers, len(metric_names))) as executor:
+        # map() yields in submission order and re-raises a worker's failure
+        # when its result is reached
+        for metric_name, csv_data in zip(metric_names, executor.map(fetch, metric_names)):
+            report_metric_stats(csv_data, metric_name, output_dir)
+
+
 if __name__ == "__main__":
     import argparse
     
@@ -209,8 +271,8 @@ if __name__ == "__main__":
                        help='Start date (YYYY-MM-DD)')
     parser.add_argument('--end-date', type=str, required=True,
                        help='End date (YYYY-MM-DD)')
-    parser.add_argument('--metric-name', type=str,
-                       help='Metric name for stats over time analysis (optional)')
+    parser.add_argument('--metric-name', type=str, nargs='+',
+                       help='Metric name(s) for stats over time analysis (optional, analyzed in parallel)')
     parser.add_argument('--coverage-only', action='store_true',
                        help='Only calculate coverage, skip stats over time')
     parser.add_argument('--dbname', type=str, help='Database name')
@@ -239,15 +301,15 @@ if __name__ == "__main__":
     try:
         # Calculate coverage
         coverage_path = output_dir / 'metric_coverage.csv'
-        calculate_metric_coverage(db, args.start_date, args.end_date, str(coverage_path))
+        coverage_df = calculate_metric_coverage(db, args.start_date, args.end_date,
+                                                str(coverage_path))
         
         # Analyze specific metric if provided
         if args.metric_name and not args.coverage_only:
-            analyze_metric_from_db(db, args.metric_name, args.start_date, 
-                                  args.end_date, str(output_dir))
+            analyze_metrics_from_db(db, args.metric_name, args.start_date,
+                                    args.end_date, str(output_dir))
         elif not args.coverage_only:
             # Use first metric from coverage if available
-            coverage_df = pd.read_csv(coverage_path)
             if len(coverage_df) > 0:
                 first_metric = coverage_df.iloc[0]['metric_name']
                 print(f"\n{'='*60}")
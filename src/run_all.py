@@ -0,0 +1,73 @@
+"""
+Run milestones 1-3 in one process
+Analyses, metrics and the customer dataset share a single Database
+"""
+import logging
+import sys
+try:
+    from .database import Database
+    from . import run_analysis, run_metrics, run_dataset
+except ImportError:
+    from database import Database
+    import run_analysis
+    import run_metrics
+    import run_dataset
+
+
+def main():
+    """Main function to run all milestones against one database connection"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Run milestones 1-3: analyses, metrics and customer dataset')
+    parser.add_argument('--start-date', type=str, required=True,
+                       help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--end-date', type=str, required=True,
+                       help='End date (YYYY-MM-DD)')
+    parser.add_argument('--event-type', type=str,
+                       help='Event type name for per-day analysis (optional)')
+    parser.add_argument('--metric-name', type=str, nargs='+',
+                       help='Specific metric name(s) for detailed analysis (optional, analyzed in parallel)')
+    parser.add_argument('--min-events-per-month', type=float, default=0.05,
+                       help='Minimum events per month threshold')
+    parser.add_argument('--skip-calculation', action='store_true',
+                       help='Skip metric calculation (use existing metrics)')
+    parser.add_argument('--dataset-name', type=str, default='current_customer_dataset.csv',
+                       help='Name for the dataset file')
+    parser.add_argument('--format', type=str, choices=['csv', 'parquet'],
+                       help='Dataset file format (defaults to the --dataset-name extension)')
+    parser.add_argument('--dbname', type=str, help='Database name')
+    parser.add_argument('--user', type=str, help='Database user')
+    parser.add_argument('--password', type=str, help='Database password')
+    parser.add_argument('--host', type=str, default='localhost', help='Database host')
+    parser.add_argument('--port', type=int, default=5432, help='Database port')
+    parser.add_argument('--schema', type=str, default='churn_analytics', help='Schema name')
+    parser.add_argument('--output-dir', type=str, default='output',
+                       help='Output directory for results')
+    # The dataset is always created from the metrics calculated above
+    parser.set_defaults(skip_dataset=False, dataset_path=None)
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    
+    db = Database(
+        dbname=args.dbname,
+        user=args.user,
+        password=args.password,
+        host=args.host,
+        port=args.port,
+        schema=args.schema
+    )
+    
+    try:
+        run_analysis.run(args, db)
+        run_metrics.run(args, db)
+        run_dataset.run(args, db)
+    except Exception as e:
+        print(f"Error running milestones: {e}", file=sys.stderr)
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,16 @@
 Run analysis queries and generate visualizations
 Main script to run milestone 1 analyses
 """
+import io
 import sys
+import numpy as np
 import pandas as pd
 from pathlib import Path
 try:
-    from .database import Database
+    from .database import Database, load_sql
     from .visualize_events import visualize_event_from_db, get_events_per_day
 except ImportError:
-    from database import Database
+    from database import Database, load_sql
     from visualize_events import visualize_event_from_db, get_events_per_day
 from psycopg2 import sql
 
@@ -36,29 +38,24 @@ def run_events_per_account_analysis(db: Database,
     print("Events Per Account Per Month Analysis")
     print(f"{'='*60}")
     
-    # Read SQL query
-    sql_path = Path(__file__).parent.parent / 'sql' / 'events_per_account.sql'
-    with open(sql_path, 'r') as f:
-        query = f.read()
-    
-    # Replace placeholders
-    query = query.replace('%from_yyyy-mm-dd', start_date)
-    query = query.replace('%to_yyyy-mm-dd', end_date)
-    
-    db.set_search_path()
-    db.execute(query)
-    results = db.cursor.fetchall()
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(results, columns=[
-        'event_type_name', 'n_event', 'n_account', 'events_per_account',
-        'n_months', 'events_per_account_per_month'
-    ])
+    # Let the server format the result as CSV; save those bytes as-is and
+    # parse the DataFrame from them
+    buffer = io.BytesIO()
+    db.copy_to(load_sql('events_per_account.sql'), buffer,
+               {'start_date': start_date, 'end_date': end_date})
     
     if output_path:
-        df.to_csv(output_path, index=False)
+        Path(output_path).write_bytes(buffer.getvalue())
         print(f"\nSaved results to {output_path}")
     
+    buffer.seek(0)
+    # Event names are kept as text, even ones like "NA" or "123"
+    df = pd.read_csv(buffer, dtype={'event_type_name': str}, keep_default_na=False)
+    
+    if df.empty:
+        print("\nNo events found in the date range")
+        return df
+    
     # Print summary
     print(f"\nTotal event types: {len(df)}")
     print(f"\nMost common events (top 10):")
@@ -98,50 +95,95 @@ def run_events_per_day_analysis(db: Database,
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Get data and create visualization
-    visualize_event_from_db(db, event_type_name, start_date, end_date, output_dir)
+    # Get data and create visualization; the returned DataFrame (event_date
+    # already parsed) is analyzed directly instead of re-reading the CSV
+    df = visualize_event_from_db(db, event_type_name, start_date, end_date, output_dir)
+    if df.empty:
+        print("\nNo days in the date range")
+        return
     
-    # Load the CSV to analyze patterns
-    if output_dir:
-        csv_path = output_dir / f'{event_type_name}_events_per_day.csv'
-    else:
-        csv_path = Path(f'{event_type_name}_events_per_day.csv')
-    
-    df = pd.read_csv(csv_path)
-    df['event_date'] = pd.to_datetime(df['event_date'])
+    # Work on plain arrays: one percentile call gives the quartiles and
+    # median, the other statistics reuse the same buffer
+    counts = df['n_event'].to_numpy()
+    dates = df['event_date'].to_numpy(dtype='datetime64[D]')
+    Q1, median, Q3 = np.percentile(counts, [25, 50, 75])
+    days_with_events = np.count_nonzero(counts)
     
     # Analyze patterns
-    print(f"\nDate range: {df['event_date'].min()} to {df['event_date'].max()}")
-    print(f"Total days: {len(df)}")
-    print(f"Days with events: {(df['n_event'] > 0).sum()}")
-    print(f"Days with zero events: {(df['n_event'] == 0).sum()}")
-    print(f"Average events per day: {df['n_event'].mean():.2f}")
-    print(f"Median events per day: {df['n_event'].median():.2f}")
-    print(f"Max events per day: {df['n_event'].max()}")
-    print(f"Min events per day: {df['n_event'].min()}")
-    
-    # Check for gaps
-    df_sorted = df.sort_values('event_date')
-    date_diff = df_sorted['event_date'].diff().dt.days
-    gaps = date_diff[date_diff > 1]
-    if len(gaps) > 0:
-        print(f"\nFound {len(gaps)} gaps in the data (more than 1 day between consecutive dates)")
+    print(f"\nDate range: {pd.Timestamp(dates.min())} to {pd.Timestamp(dates.max())}")
+    print(f"Total days: {len(counts)}")
+    print(f"Days with events: {days_with_events}")
+    print(f"Days with zero events: {len(counts) - days_with_events}")
+    print(f"Average events per day: {counts.mean():.2f}")
+    print(f"Median events per day: {median:.2f}")
+    print(f"Max events per day: {counts.max()}")
+    print(f"Min events per day: {counts.min()}")
+    
+    # Check for gaps (the query returns dates in order, so sorting is
+    # normally skipped)
+    if not df['event_date'].is_monotonic_increasing:
+        dates = np.sort(dates)
+    n_gaps = np.count_nonzero(np.diff(dates).astype(np.int64) > 1)
+    if n_gaps > 0:
+        print(f"\nFound {n_gaps} gaps in the data (more than 1 day between consecutive dates)")
     else:
         print("\nNo gaps found in the date sequence")
     
     # Check for outliers (using IQR method)
-    Q1 = df['n_event'].quantile(0.25)
-    Q3 = df['n_event'].quantile(0.75)
     IQR = Q3 - Q1
     lower_bound = Q1 - 1.5 * IQR
     upper_bound = Q3 + 1.5 * IQR
-    outliers = df[(df['n_event'] < lower_bound) | (df['n_event'] > upper_bound)]
+    outliers = df[(counts < lower_bound) | (counts > upper_bound)]
     print(f"\nOutliers detected (using IQR method): {len(outliers)}")
     if len(outliers) > 0:
         print("Outlier dates:")
         print(outliers[['event_date', 'n_event']].to_string(index=False))
 
 
+def run(args, db: Database):
+    """
+    Run all milestone 1 analyses
+    
+    Args:
+        args: Parsed arguments (start_date, end_date, event_type, output_dir,
+            min_events_per_month)
+        db: Database instance
+    """
+    # Create output directory
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Run events per account analysis
+    events_per_account_path = output_dir / 'events_per_account_per_month.csv'
+    df_events = run_events_per_account_analysis(
+        db, args.start_date, args.end_date,
+        str(events_per_account_path),
+        args.min_events_per_month
+    )
+    
+    # If event type specified, run per-day analysis
+    if args.event_type:
+        run_events_per_day_analysis(
+            db, args.event_type, args.start_date, args.end_date, str(output_dir)
+        )
+    elif df_events.empty:
+        print("\nNo event types to run the per-day analysis for")
+    else:
+        # Use the most common event type
+        most_common = df_events.iloc[0]['event_type_name']
+        print(f"\n{'='*60}")
+        print(f"Running per-day analysis for most common event: {most_common}")
+        print(f"{'='*60}")
+        run_events_per_day_analysis(
+            db, most_common, args.start_date, args.end_date, str(output_dir)
+        )
+    
+    print(f"\n{'='*60}")
+    print("Analysis complete!")
+    print(f"Results saved to: {output_dir}")
+    print(f"{'='*60}")
+
+
 def main():
     """Main function to run all analyses"""
     import argparse
@@ -166,10 +208,6 @@ def main():
     
     args = parser.parse_args()
     
-    # Create output directory
-    output_dir = Path(args.output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
     db = Database(
         dbname=args.dbname,
         user=args.user,
@@ -180,34 +218,7 @@ def main():
     )
     
     try:
-        # Run events per account analysis
-        events_per_account_path = output_dir / 'events_per_account_per_month.csv'
-        df_events = run_events_per_account_analysis(
-            db, args.start_date, args.end_date,
-            str(events_per_account_path),
-            args.min_events_per_month
-        )
-        
-        # If event type specified, run per-day analysis
-        if args.event_type:
-            run_events_per_day_analysis(
-                db, args.event_type, args.start_date, args.end_date, str(output_dir)
-            )
-        else:
-            # Use the most common event type
-            most_common = df_events.iloc[0]['event_type_name']
-            print(f"\n{'='*60}")
-            print(f"Running per-day analysis for most common event: {most_common}")
-            print(f"{'='*60}")
-            run_events_per_day_analysis(
-                db, most_common, args.start_date, args.end_date, str(output_dir)
-            )
-        
-        print(f"\n{'='*60}")
-        print("Analysis complete!")
-        print(f"Results saved to: {output_dir}")
-        print(f"{'='*60}")
-        
+        run(args, db)
     except Exception as e:
         print(f"Error running analysis: {e}", file=sys.stderr)
         raise
@@ -3,38 +3,26 @@ Main script to create current customer dataset and calculate statistics
 Milestone 3: Current Customer Dataset
 """
 import sys
-import pandas as pd
 from pathlib import Path
 try:
+    from .database import Database
     from .create_dataset import create_current_dataset
     from .dataset_stats import dataset_stats
 except ImportError:
+    from database import Database
     from create_dataset import create_current_dataset
     from dataset_stats import dataset_stats
 
 
-def main():
-    """Main function to create dataset and calculate statistics"""
-    import argparse
-    
-    parser = argparse.ArgumentParser(description='Run milestone 3: Create current customer dataset')
-    parser.add_argument('--output-dir', type=str, default='output',
-                       help='Output directory for results')
-    parser.add_argument('--dataset-name', type=str, default='current_customer_dataset.csv',
-                       help='Name for the dataset file')
-    parser.add_argument('--dbname', type=str, help='Database name')
-    parser.add_argument('--user', type=str, help='Database user')
-    parser.add_argument('--password', type=str, help='Database password')
-    parser.add_argument('--host', type=str, default='localhost', help='Database host')
-    parser.add_argument('--port', type=int, default=5432, help='Database port')
-    parser.add_argument('--schema', type=str, default='churn_analytics', help='Schema name')
-    parser.add_argument('--skip-dataset', action='store_true',
-                       help='Skip dataset creation (use existing dataset)')
-    parser.add_argument('--dataset-path', type=str,
-                       help='Path to existing dataset (if skipping creation)')
-    
-    args = parser.parse_args()
+def run(args, db: Database):
+    """
+    Create the current customer dataset and calculate its statistics
     
+    Args:
+        args: Parsed arguments (output_dir, dataset_name, format,
+            skip_dataset, dataset_path)
+        db: Database instance (only queried when the dataset is created)
+    """
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
@@ -42,35 +30,23 @@ def main():
         dataset_path = Path(args.dataset_path)
     else:
         dataset_path = output_dir / args.dataset_name
+        if args.format:
+            dataset_path = dataset_path.with_suffix(f'.{args.format}')
     
     # Step 1: Create dataset (unless skipped)
     if not args.skip_dataset:
-        from database import Database
-        
-        db = Database(
-            dbname=args.dbname,
-            user=args.user,
-            password=args.password,
-            host=args.host,
-            port=args.port,
-            schema=args.schema
-        )
-        
-        try:
-            dataset = create_current_dataset(db, str(dataset_path))
-            print(f"\nDataset created with {len(dataset):,} customers and {len(dataset.columns)} metrics")
-        except Exception as e:
-            print(f"Error creating dataset: {e}", file=sys.stderr)
-            raise
-        finally:
-            db.close()
+        dataset = create_current_dataset(db, str(dataset_path))
+        print(f"\nDataset created with {len(dataset):,} customers and {len(dataset.columns)} metrics")
     else:
         print(f"Using existing dataset: {dataset_path}")
         if not dataset_path.exists():
             raise FileNotFoundError(f"Dataset not found: {dataset_path}")
     
     # Step 2: Calculate statistics
-    summary = dataset_stats(str(dataset_path))
+    # The summary has one row per metric, so the dataset does not have to be
+    # read again for its shape
+    summary, n_customers = dataset_stats(str(dataset_path))
+    n_metrics = len(summary)
     
     print(f"\n{'='*60}")
     print("Milestone 3 Complete!")
@@ -79,11 +55,55 @@ def main():
     print(f"  1. Current customer dataset: {dataset_path}")
     print(f"  2. Summary statistics: {dataset_path.parent / (dataset_path.stem + '_summarystats.csv')}")
     print(f"\nDataset contains:")
-    print(f"  - {len(pd.read_csv(dataset_path, index_col=[0,1])):,} customers")
-    print(f"  - {len(pd.read_csv(dataset_path, index_col=[0,1]).columns)} metrics")
+    print(f"  - {n_customers:,} customers")
+    print(f"  - {n_metrics} metrics")
     print(f"{'='*60}")
 
 
+
+def main():
+    """Main function to create dataset and calculate statistics"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Run milestone 3: Create current customer dataset')
+    parser.add_argument('--output-dir', type=str, default='output',
+                       help='Output directory for results')
+    parser.add_argument('--dataset-name', type=str, default='current_customer_dataset.csv',
+                       help='Name for the dataset file')
+    parser.add_argument('--format', type=str, choices=['csv', 'parquet'],
+                       help='Dataset file format (defaults to the --dataset-name extension)')
+    parser.add_argument('--dbname', type=str, help='Database name')
+    parser.add_argument('--user', type=str, help='Database user')
+    parser.add_argument('--password', type=str, help='Database password')
+    parser.add_argument('--host', type=str, default='localhost', help='Database host')
+    parser.add_argument('--port', type=int, default=5432, help='Database port')
+    parser.add_argument('--schema', type=str, default='churn_analytics', help='Schema name')
+    parser.add_argument('--skip-dataset', action='store_true',
+                       help='Skip dataset creation (use existing dataset)')
+    parser.add_argument('--dataset-path', type=str,
+                       help='Path to existing dataset (if skipping creation)')
+    
+    args = parser.parse_args()
+    
+    # Connects lazily, so nothing is opened when the dataset creation is skipped
+    db = Database(
+        dbname=args.dbname,
+        user=args.user,
+        password=args.password,
+        host=args.host,
+        port=args.port,
+        schema=args.schema
+    )
+    
+    try:
+        run(args, db)
+    except Exception as e:
+        print(f"Error running dataset: {e}", file=sys.stderr)
+        raise
+    finally:
+        db.close()
+
+
 if __name__ == "__main__":
     main()
 
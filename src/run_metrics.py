@@ -2,19 +2,76 @@
 Main script to run all metric calculations and analyses
 Combines metric calculation and analysis steps
 """
+import logging
 import sys
 from pathlib import Path
 try:
     from .database import Database
     from .calculate_metrics import create_metric_tables, calculate_metrics_for_common_events
-    from .metric_analysis import calculate_metric_coverage, analyze_metric_from_db
+    from .metric_analysis import calculate_metric_coverage, analyze_metrics_from_db
 except ImportError:
     from database import Database
     from calculate_metrics import create_metric_tables, calculate_metrics_for_common_events
-    from metric_analysis import calculate_metric_coverage, analyze_metric_from_db
+    from metric_analysis import calculate_metric_coverage, analyze_metrics_from_db
 import pandas as pd
 
 
+def run(args, db: Database):
+    """
+    Run all milestone 2 metric calculations and analyses
+    
+    Args:
+        args: Parsed arguments (start_date, end_date, metric_name,
+            min_events_per_month, output_dir, skip_calculation)
+        db: Database instance
+    """
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Step 1: Create metric tables
+    create_metric_tables(db)
+    
+    # Step 2: Calculate metrics (unless skipped)
+    if not args.skip_calculation:
+        calculate_metrics_for_common_events(
+            db, args.start_date, args.end_date, args.min_events_per_month
+        )
+    else:
+        print("Skipping metric calculation (using existing metrics)")
+    
+    # Step 3: Calculate metric coverage
+    coverage_path = output_dir / 'metric_coverage.csv'
+    coverage_df = calculate_metric_coverage(
+        db, args.start_date, args.end_date, str(coverage_path)
+    )
+    
+    # Step 4: Analyze specific metrics or first metric
+    if args.metric_name:
+        metrics_to_analyze = args.metric_name
+    elif len(coverage_df) > 0:
+        metrics_to_analyze = [coverage_df.iloc[0]['metric_name']]
+        print(f"\n{'='*60}")
+        print(f"Analyzing first metric: {metrics_to_analyze[0]}")
+        print(f"{'='*60}")
+    else:
+        print("\nNo metrics found to analyze")
+        return
+    
+    analyze_metrics_from_db(
+        db, metrics_to_analyze, args.start_date, args.end_date, str(output_dir)
+    )
+    
+    print(f"\n{'='*60}")
+    print("Milestone 2 Complete!")
+    print(f"Results saved to: {output_dir}")
+    print(f"\nDeliverables:")
+    print(f"  1. Metric coverage: {coverage_path}")
+    for metric_to_analyze in metrics_to_analyze:
+        print(f"  2. Metric stats over time: {output_dir / f'{metric_to_analyze}_stats_over_time.csv'}")
+        print(f"  3. Metric visualization: {output_dir / f'{metric_to_analyze}_metric_qa.png'}")
+    print(f"{'='*60}")
+
+
 def main():
     """Main function to run all metric calculations and analyses"""
     import argparse
@@ -24,8 +81,8 @@ def main():
                        help='Start date (YYYY-MM-DD)')
     parser.add_argument('--end-date', type=str, required=True,
                        help='End date (YYYY-MM-DD)')
-    parser.add_argument('--metric-name', type=str,
-                       help='Specific metric name for detailed analysis (optional)')
+    parser.add_argument('--metric-name', type=str, nargs='+',
+                       help='Specific metric name(s) for detailed analysis (optional, analyzed in parallel)')
     parser.add_argument('--min-events-per-month', type=float, default=0.05,
                        help='Minimum events per month threshold')
     parser.add_argument('--dbname', type=str, help='Database name')
@@ -40,9 +97,7 @@ def main():
                        help='Skip metric calculation (use existing metrics)')
     
     args = parser.parse_args()
-    
-    output_dir = Path(args.output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
     
     db = Database(
         dbname=args.dbname,
@@ -54,48 +109,7 @@ def main():
     )
     
     try:
-        # Step 1: Create metric tables
-        create_metric_tables(db)
-        
-        # Step 2: Calculate metrics (unless skipped)
-        if not args.skip_calculation:
-            calculate_metrics_for_common_events(
-                db, args.start_date, args.end_date, args.min_events_per_month
-            )
-        else:
-            print("Skipping metric calculation (using existing metrics)")
-        
-        # Step 3: Calculate metric coverage
-        coverage_path = output_dir / 'metric_coverage.csv'
-        coverage_df = calculate_metric_coverage(
-            db, args.start_date, args.end_date, str(coverage_path)
-        )
-        
-        # Step 4: Analyze specific metric or first metric
-        if args.metric_name:
-            metric_to_analyze = args.metric_name
-        elif len(coverage_df) > 0:
-            metric_to_analyze = coverage_df.iloc[0]['metric_name']
-            print(f"\n{'='*60}")
-            print(f"Analyzing first metric: {metric_to_analyze}")
-            print(f"{'='*60}")
-        else:
-            print("\nNo metrics found to analyze")
-            return
-        
-        analyze_metric_from_db(
-            db, metric_to_analyze, args.start_date, args.end_date, str(output_dir)
-        )
-        
-        print(f"\n{'='*60}")
-        print("Milestone 2 Complete!")
-        print(f"Results saved to: {output_dir}")
-        print(f"\nDeliverables:")
-        print(f"  1. Metric coverage: {coverage_path}")
-        print(f"  2. Metric stats over time: {output_dir / f'{metric_to_analyze}_stats_over_time.csv'}")
-        print(f"  3. Metric visualization: {output_dir / f'{metric_to_analyze}_metric_qa.png'}")
-        print(f"{'='*60}")
-        
+        run(args, db)
     except Exception as e:
         print(f"Error running metrics: {e}", file=sys.stderr)
         raise
@@ -1,18 +1,20 @@
 """
 Visualize event counts over time
 """
+import io
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 from math import ceil
 from pathlib import Path
 try:
-    from .database import Database
+    from .database import Database, load_sql
 except ImportError:
-    from database import Database
+    from database import Database, load_sql
 from psycopg2 import sql
 
 
-def event_count_plot(event_data_path: str, event_name: str, output_dir: str = None):
+def event_count_plot(event_data_path: str, event_name: str, output_dir: str = None,
+                     qa_data_df: pd.DataFrame = None):
     """
     Create a plot of event counts over time
     
@@ -20,23 +22,31 @@ def event_count_plot(event_data_path: str, event_name: str, output_dir: str = No
         event_data_path: Path to CSV file with event data (columns: event_date, n_event)
         event_name: Name of the event type for the plot title
         output_dir: Directory to save the plot (defaults to same directory as data)
+        qa_data_df: Event data already in memory (skips reading event_data_path)
     """
-    qa_data_df = pd.read_csv(event_data_path)
-    
-    plt.figure(figsize=(12, 6))
-    plt.plot('event_date', 'n_event', data=qa_data_df, marker='', color='black', linewidth=2)
-    plt.ylim(0, ceil(1.1 * qa_data_df['n_event'].dropna().max()))
-    plt.title(f'{event_name} event count over time')
-    plt.xlabel('Date')
-    plt.ylabel('Number of Events')
-    plt.gca().figure.autofmt_xdate()
+    # Imported here so callers that only need the CSV never load matplotlib
+    from matplotlib.figure import Figure
+    
+    if qa_data_df is None:
+        qa_data_df = pd.read_csv(event_data_path, parse_dates=['event_date'])
+    n_event = qa_data_df['n_event'].to_numpy(dtype=float)
+    
+    # A standalone Figure renders with Agg, without pyplot's global state
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    ax.plot(qa_data_df['event_date'].to_numpy(), n_event, marker='', color='black', linewidth=2)
+    ax.set_ylim(0, ceil(1.1 * np.nanmax(n_event)))
+    ax.set_title(f'{event_name} event count over time')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Number of Events')
+    fig.autofmt_xdate()
     
     # Show only first of each month on x-axis
-    dates = qa_data_df['event_date'].tolist()
-    plt.xticks(list(filter(lambda x: x.endswith(("01")), dates)), rotation=45)
+    month_starts = qa_data_df.loc[qa_data_df['event_date'].dt.day == 1, 'event_date']
+    ax.set_xticks(month_starts.to_numpy(), month_starts.dt.strftime('%Y-%m-%d'), rotation=45)
     
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
     
     # Save plot
     if output_dir:
@@ -45,9 +55,8 @@ def event_count_plot(event_data_path: str, event_name: str, output_dir: str = No
         output_path = Path(event_data_path).parent / f'{event_name}_event_qa.png'
     
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(output_path, dpi=150)
+    fig.savefig(output_path, dpi=150)
     print(f'Saving event QA plot to {output_path}')
-    plt.close()
 
 
 def get_events_per_day(db: Database, 
@@ -68,27 +77,22 @@ def get_events_per_day(db: Database,
     Returns:
         DataFrame with event_date and n_event columns
     """
-    # Read SQL query
-    sql_path = Path(__file__).parent.parent / 'sql' / 'events_per_day.sql'
-    with open(sql_path, 'r') as f:
-        query = f.read()
-    
-    # Replace placeholders
-    query = query.replace('%from_yyyy-mm-dd', start_date)
-    query = query.replace('%to_yyyy-mm-dd', end_date)
-    query = query.replace('%event2measure', event_type_name)
-    
-    db.set_search_path()
-    db.execute(query)
-    results = db.cursor.fetchall()
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(results, columns=['event_date', 'n_event'])
+    # Let the server format the result as CSV; save those bytes as-is and
+    # parse the DataFrame from them
+    buffer = io.BytesIO()
+    db.copy_to(load_sql('events_per_day.sql'), buffer, {
+        'start_date': start_date,
+        'end_date': end_date,
+        'event_type_name': event_type_name,
+    })
     
     if output_path:
-        df.to_csv(output_path, index=False)
+        Path(output_path).write_bytes(buffer.getvalue())
         print(f'Saved events per day data to {output_path}')
     
+    buffer.seek(0)
+    df = pd.read_csv(buffer, parse_dates=['event_date'])
+    
     return df
 
 
@@ -106,6 +110,9 @@ def visualize_event_from_db(db: Database,
         start_date: Start date in YYYY-MM-DD format
         end_date: End date in YYYY-MM-DD format
         output_dir: Directory to save outputs
+    
+    Returns:
+        DataFrame with event_date and n_event columns
     """
     if output_dir:
         output_dir = Path(output_dir)
@@ -117,8 +124,13 @@ def visualize_event_from_db(db: Database,
     # Get data from database
     df = get_events_per_day(db, event_type_name, start_date, end_date, str(csv_path))
     
-    # Create visualization
-    event_count_plot(str(csv_path), event_type_name, output_dir)
+    # Create visualization from the same DataFrame (no CSV re-read)
+    if df.empty:
+        print(f'No data to plot for {event_type_name}')
+    else:
+        event_count_plot(str(csv_path), event_type_name, output_dir, qa_data_df=df)
+    
+    return df
 
 
 if __name__ == "__main__":
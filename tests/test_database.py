@@ -0,0 +1,31 @@
+"""
+Tests for the database connection settings
+"""
+import sys
+import unittest
+from pathlib import Path
+
+src_path = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(src_path))
+
+from database import Database
+
+
+class ConnectionParamsTest(unittest.TestCase):
+
+    def search_path_option(self, schema: str) -> str:
+        return Database(schema=schema).connection_params()['options']
+
+    def test_plain_schema(self):
+        self.assertEqual(self.search_path_option('churn_analytics'),
+                         '-c search_path="churn_analytics"')
+
+    def test_schema_is_quoted_and_escaped(self):
+        self.assertEqual(self.search_path_option('Churn Data'),
+                         '-c search_path="Churn\\ Data"')
+        self.assertEqual(self.search_path_option('a\\b"c'),
+                         '-c search_path="a\\\\b""c"')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Tests for the dataset summary statistics
+"""
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+src_path = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(src_path))
+
+from dataset_stats import pandas_summary_stats, summary_stats
+
+
+def make_dataset(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Random float32 metrics with some zeros and a constant column"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'count_login': rng.poisson(3, n_rows),
+        'count_view': rng.exponential(10, n_rows),
+        'constant': np.ones(n_rows),
+    }, dtype=np.float32)
+
+
+class SummaryStatsTest(unittest.TestCase):
+
+    def assert_matches_pandas(self, churn_data: pd.DataFrame):
+        expected = pandas_summary_stats(churn_data).astype(float)
+        actual = summary_stats(churn_data).astype(float)
+        self.assertEqual(list(actual.columns), list(expected.columns))
+        self.assertEqual(list(actual.index), list(expected.index))
+        np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(),
+                                   rtol=1e-4, atol=1e-4, equal_nan=True)
+
+    def test_complete_data(self):
+        self.assert_matches_pandas(make_dataset(1000))
+
+    def test_complete_data_over_several_blocks(self):
+        self.assert_matches_pandas(make_dataset(450_000))
+
+    def test_missing_values(self):
+        churn_data = make_dataset(1000)
+        churn_data.iloc[::7, 0] = np.nan
+        churn_data.iloc[3, 1] = np.nan
+        summary = summary_stats(churn_data)
+        self.assert_matches_pandas(churn_data)
+        self.assertEqual(summary.loc['count_login', 'count'], churn_data['count_login'].count())
+        self.assertFalse(np.isnan(summary.loc['count_login', 'mean']))
+        self.assertFalse(np.isnan(summary.loc['count_view', 'max']))
+
+    def test_all_missing_column(self):
+        churn_data = make_dataset(10)
+        churn_data['count_login'] = np.nan
+        self.assert_matches_pandas(churn_data)
+
+    def test_empty_dataset(self):
+        churn_data = make_dataset(0)
+        summary = summary_stats(churn_data)
+        self.assertTrue((summary['count'] == 0).all())
+        self.assert_matches_pandas(churn_data)
+
+    def test_fewer_than_three_rows(self):
+        for n_rows in (1, 2):
+            churn_data = make_dataset(n_rows)
+            summary = summary_stats(churn_data)
+            self.assertTrue(summary['skew'].isna().all())
+            self.assert_matches_pandas(churn_data)
+
+
+if __name__ == '__main__':
+    unittest.main()
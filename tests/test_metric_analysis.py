@@ -0,0 +1,78 @@
+"""
+Tests for the metric analysis outputs
+"""
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+src_path = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(src_path))
+
+from metric_analysis import analyze_metric_from_db, analyze_metrics_from_db
+
+
+class StubDatabase:
+    """Answers the metric stats query with fixed CSV data per metric"""
+
+    def __init__(self):
+        self.pooled_calls = 0
+
+    def set_search_path(self):
+        pass
+
+    def copy_to(self, query, file, params=None):
+        scale = len(params['metric_name'])
+        rows = ['calc_date,avg,n_calc,min,max']
+        for week in range(8):
+            rows.append(f'2020-01-{1 + 7 * (week % 4):02d},{scale * week / 2},{10 + week},'
+                        f'{scale * week / 4},{scale * week}')
+        rows.append('2020-03-04,,0,,')
+        file.write(('\n'.join(rows) + '\n').encode())
+
+    @contextlib.contextmanager
+    def pooled(self):
+        self.pooled_calls += 1
+        yield self
+
+
+class AnalyzeMetricsTest(unittest.TestCase):
+
+    metric_names = ['count_login', 'count_view', 'count_purchase_event']
+
+    def run_and_capture(self, analyze, output_dir: Path) -> str:
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            analyze(str(output_dir))
+        return stdout.getvalue().replace(str(output_dir), '<output>')
+
+    def test_parallel_matches_serial(self):
+        db = StubDatabase()
+        with tempfile.TemporaryDirectory() as tmp:
+            serial_dir = Path(tmp) / 'serial'
+            parallel_dir = Path(tmp) / 'parallel'
+
+            def serial(output_dir):
+                for metric_name in self.metric_names:
+                    analyze_metric_from_db(db, metric_name, '2020-01-01', '2020-03-31', output_dir)
+
+            def parallel(output_dir):
+                analyze_metrics_from_db(db, self.metric_names, '2020-01-01', '2020-03-31',
+                                        output_dir, workers=3)
+
+            serial_output = self.run_and_capture(serial, serial_dir)
+            parallel_output = self.run_and_capture(parallel, parallel_dir)
+
+            self.assertEqual(db.pooled_calls, len(self.metric_names))
+            self.assertEqual(parallel_output, serial_output)
+            self.assertEqual(sorted(p.name for p in parallel_dir.iterdir()),
+                             sorted(p.name for p in serial_dir.iterdir()))
+            for csv_path in serial_dir.glob('*.csv'):
+                self.assertEqual((parallel_dir / csv_path.name).read_bytes(),
+                                 csv_path.read_bytes())
+
+
+if __name__ == '__main__':
+    unittest.main()